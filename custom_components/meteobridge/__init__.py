@@ -2,17 +2,17 @@
 
 from __future__ import annotations
 
+from collections.abc import Mapping
 from datetime import timedelta
 import logging
-from typing import Self, cast
+import time
+from typing import Any, Self
 
 from pymeteobridgesql import (
     ForecastDaily,
     ForecastHourly,
     MeteobridgeSQLDatabaseConnectionError,
     MeteobridgeSQLDataError,
-    MeteobridgeSQL,
-    RealtimeData,
 )
 
 from homeassistant.config_entries import ConfigEntry, ConfigEntryState
@@ -30,22 +30,64 @@ from homeassistant.exceptions import (
     ConfigEntryNotReady,
     Unauthorized,
 )
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.helpers.typing import ConfigType
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
 from homeassistant.loader import async_get_integration
 
 from .const import (
+    CONF_COMPRESSION,
+    CONF_DAILY_FROM_HOURLY,
     CONF_DATABASE,
+    CONF_REPLICA,
+    CONF_STATISTICS,
     CONF_UPDATE_INTERVAL,
+    DATA_HANDOFF,
+    DATA_PROFILER,
+    DATA_SCHEDULER,
+    DEFAULT_COMPRESSION,
+    DEFAULT_DAILY_FROM_HOURLY,
+    DEFAULT_REPLICA,
     DEFAULT_UPDATE_INTERVAL,
     DOMAIN,
+    FORECAST_DAILY_MAX_AGE,
+    HOST_CHECK_INTERVAL,
+    REPLICA_SYNC_INTERVAL,
     STARTUP,
 )
-
+from .database import MeteobridgeSQLDatabase, ValidatedConnection
+from .forecast import daily_from_hourly
+from .replica import MeteobridgeSQLReplica
+from .scheduler import MeteobridgeSQLScheduler
+from .services import async_setup_services
+from .snapshot import RealtimeSnapshot
+
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
 PLATFORMS = [Platform.SENSOR, Platform.WEATHER]
 
+# Entry data that changes which entities exist, and data that only changes how
+# the database is reached. Everything else is applied to the coordinator.
+RELOAD_KEYS = {CONF_MAC, CONF_REPLICA, CONF_STATISTICS}
+CONNECTION_KEYS = {
+    CONF_HOST,
+    CONF_PORT,
+    CONF_USERNAME,
+    CONF_PASSWORD,
+    CONF_DATABASE,
+    CONF_COMPRESSION,
+}
+
 _LOGGER = logging.getLogger(__name__)
 
 
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
+    """Set up the MeteobridgeSQL services and refresh scheduler."""
+    hass.data[DATA_SCHEDULER] = MeteobridgeSQLScheduler(hass)
+    async_setup_services(hass)
+    return True
+
+
 async def async_setup_entry(hass: HomeAssistant, config_entry: ConfigEntry) -> bool:
     """Set up MeteobridgeSQL as config entry."""
     hass.data.setdefault(DOMAIN, {})
@@ -60,14 +102,48 @@ async def async_setup_entry(hass: HomeAssistant, config_entry: ConfigEntry) -> b
 
     hass.data.setdefault(DOMAIN, {})
     hass.data[DOMAIN][config_entry.entry_id] = coordinator
+    config_entry.async_on_unload(hass.data[DATA_SCHEDULER].async_add(coordinator))
 
     config_entry.async_on_unload(config_entry.add_update_listener(async_update_entry))
+    config_entry.async_on_unload(
+        async_track_time_interval(
+            hass, coordinator.async_check_hosts, timedelta(seconds=HOST_CHECK_INTERVAL)
+        )
+    )
+    config_entry.async_create_background_task(
+        hass, coordinator.async_check_hosts(), f"{DOMAIN} host check"
+    )
+
+    if config_entry.data.get(CONF_REPLICA, DEFAULT_REPLICA):
+        await _async_setup_replica(hass, config_entry, coordinator)
 
     await hass.config_entries.async_forward_entry_setups(config_entry, PLATFORMS)
 
     return True
 
 
+async def _async_setup_replica(
+    hass: HomeAssistant,
+    config_entry: ConfigEntry,
+    coordinator: MeteobridgeSQLDataUpdateCoordinator,
+) -> None:
+    """Start keeping the local archive replica in sync."""
+    replica = MeteobridgeSQLReplica(
+        hass, coordinator.weather.database, config_entry.data[CONF_MAC]
+    )
+    await hass.async_add_executor_job(replica.open)
+    coordinator.replica = replica
+
+    config_entry.async_on_unload(
+        async_track_time_interval(
+            hass, replica.async_sync, timedelta(seconds=REPLICA_SYNC_INTERVAL)
+        )
+    )
+    config_entry.async_create_background_task(
+        hass, replica.async_sync(), f"{DOMAIN} replica sync"
+    )
+
+
 async def async_unload_entry(hass: HomeAssistant, config_entry: ConfigEntry) -> bool:
     """Unload a config entry."""
 
@@ -75,14 +151,23 @@ async def async_unload_entry(hass: HomeAssistant, config_entry: ConfigEntry) ->
         config_entry, PLATFORMS
     )
 
-    hass.data[DOMAIN].pop(config_entry.entry_id)
+    coordinator: MeteobridgeSQLDataUpdateCoordinator = hass.data[DOMAIN].pop(
+        config_entry.entry_id
+    )
+    if coordinator.replica is not None:
+        await hass.async_add_executor_job(coordinator.replica.close)
+    await coordinator.weather.database.async_shutdown()
 
     return unload_ok
 
 
 async def async_update_entry(hass: HomeAssistant, config_entry: ConfigEntry):
-    """Reload MeteobridgeSQL component when options changed."""
-    await hass.config_entries.async_reload(config_entry.entry_id)
+    """Apply changed options, reloading only when the station changed."""
+    coordinator: MeteobridgeSQLDataUpdateCoordinator = hass.data[DOMAIN][
+        config_entry.entry_id
+    ]
+    if not await coordinator.async_apply_config():
+        await hass.config_entries.async_reload(config_entry.entry_id)
 
 
 class CannotConnect(HomeAssistantError):
@@ -98,8 +183,12 @@ class MeteobridgeSQLDataUpdateCoordinator(DataUpdateCoordinator["MeteobridgeSQLD
         self.weather.initialize_data()
         self.hass = hass
         self.config_entry = config_entry
-
-        update_interval = timedelta(
+        self.replica: MeteobridgeSQLReplica | None = None
+        self._entry_data = config_entry.data
+        self._scheduler: MeteobridgeSQLScheduler = hass.data[DATA_SCHEDULER]
+        self.weather.database.host_limit = self._scheduler.host_limit
+        # Polling is left to the scheduler, which staggers all stations.
+        self.refresh_interval = timedelta(
             seconds=config_entry.data.get(CONF_UPDATE_INTERVAL, DEFAULT_UPDATE_INTERVAL)
         )
 
@@ -107,16 +196,53 @@ class MeteobridgeSQLDataUpdateCoordinator(DataUpdateCoordinator["MeteobridgeSQLD
             hass,
             _LOGGER,
             name=DOMAIN,
-            update_interval=update_interval,
+            update_interval=None,
             config_entry=config_entry,
         )
 
+    async def async_apply_config(self) -> bool:
+        """Apply changed entry data in place, returning False if a reload is needed."""
+        previous, config = self._entry_data, self.config_entry.data
+        changed = {
+            key for key in {*previous, *config} if previous.get(key) != config.get(key)
+        }
+        if changed & RELOAD_KEYS:
+            return False
+
+        self._entry_data = config
+        if not changed:
+            return True
+        self.weather.apply_config(config)
+        if changed & CONNECTION_KEYS:
+            await self.weather.database.executor.async_run(self.weather.reconfigure)
+        self.refresh_interval = timedelta(
+            seconds=config.get(CONF_UPDATE_INTERVAL, DEFAULT_UPDATE_INTERVAL)
+        )
+        self._scheduler.async_reschedule()
+        await self.async_refresh()
+        return True
+
+    async def async_check_hosts(self, *_: Any) -> None:
+        """Health check the database hosts and prefer the fastest one."""
+        database = self.weather.database
+        if len(database.hosts) < 2:
+            return
+        # Probes use their own connections, so they run outside the connection's
+        # executor and a dead host does not hold up the refreshes queued there.
+        for host in database.hosts:
+            async with database.limit(host):
+                await self.hass.async_add_executor_job(database.check_host, host)
+        await database.executor.async_run(database.prefer_fastest_host)
+
     async def _async_update_data(self) -> MeteobridgeSQLData:
         """Fetch data from MeteobridgeSQL."""
         try:
             return await self.weather.fetch_data()
         except Exception as err:
             raise UpdateFailed(f"Update failed: {err}") from err
+        finally:
+            if (profiler := self.hass.data.get(DATA_PROFILER)) is not None:
+                profiler.refresh_done()
 
 
 class MeteobridgeSQLData:
@@ -126,38 +252,98 @@ class MeteobridgeSQLData:
         """Initialise the weather entity data."""
         self.hass = hass
         self._config = config.data
-        self._weather_data: MeteobridgeSQL
-        self.sensor_data: RealtimeData
-        self.daily_forecast: list[ForecastDaily]
-        self.hourly_forecast: list[ForecastHourly]
+        self._weather_data: MeteobridgeSQLDatabase
+        self.sensor_data = RealtimeSnapshot()
+        self.daily_forecast: list[ForecastDaily] = []
+        self.hourly_forecast: list[ForecastHourly] = []
+        self.daily_generation = 0
+        self.hourly_generation = 0
+        self._daily_rows: list[tuple[Any, ...]] = []
+        self._hourly_rows: list[tuple[Any, ...]] = []
+        self._daily_derived = False
+        self._daily_read = 0.0
+        self._handoff_row: tuple[Any, ...] | None = None
 
     def initialize_data(self) -> bool:
         """Establish connection to API."""
 
-        self._weather_data = MeteobridgeSQL(
+        self._weather_data = MeteobridgeSQLDatabase(
             self._config[CONF_HOST],
             self._config[CONF_USERNAME],
             self._config[CONF_PASSWORD],
             self._config[CONF_DATABASE],
             self._config[CONF_PORT],
+            self._config.get(CONF_COMPRESSION, DEFAULT_COMPRESSION),
         )
 
+        # Reuse the connection and realtime row the config flow just validated.
+        handoffs: dict[str, ValidatedConnection] = self.hass.data.get(DATA_HANDOFF, {})
+        handoff = handoffs.pop(self._config[CONF_MAC], None)
+        if handoff is not None:
+            if handoff.database.settings == self._weather_data.settings:
+                self._weather_data = handoff.database
+                self._handoff_row = handoff.row
+            else:
+                self.hass.async_create_background_task(
+                    handoff.database.async_shutdown(), f"{DOMAIN} close handoff"
+                )
+
         return True
 
+    @property
+    def database(self) -> MeteobridgeSQLDatabase:
+        """Return the database connection."""
+        return self._weather_data
+
+    def close(self) -> None:
+        """Close the database connection."""
+        self._weather_data.close()
+
+    def apply_config(self, config: Mapping[str, Any]) -> None:
+        """Use new entry settings, the options read on refresh apply at once."""
+        self._config = config
+
+    def reconfigure(self) -> None:
+        """Point the database connection at the entry settings."""
+        self._weather_data.reconfigure(
+            self._config[CONF_HOST],
+            self._config[CONF_USERNAME],
+            self._config[CONF_PASSWORD],
+            self._config[CONF_DATABASE],
+            self._config[CONF_PORT],
+            self._config.get(CONF_COMPRESSION, DEFAULT_COMPRESSION),
+        )
+
     async def fetch_data(self) -> Self:
         """Fetch data from API - (current weather and forecast)."""
-
+        executor = self._weather_data.executor
+        derive = self._config.get(CONF_DAILY_FROM_HOURLY, DEFAULT_DAILY_FROM_HOURLY)
         try:
-            await self.hass.async_add_executor_job(self._weather_data.initialize)
-            self.sensor_data: RealtimeData = (
-                await self._weather_data.async_get_realtime_data(self._config[CONF_MAC])
-            )
-            self.daily_forecast = cast(
-                list[ForecastDaily], await self._weather_data.async_get_forecast(False)
-            )
-            self.hourly_forecast = cast(
-                list[ForecastHourly], await self._weather_data.async_get_forecast(True)
+            if (row := self._handoff_row) is not None:
+                self._handoff_row = None
+            else:
+                row = await self._weather_data.async_run(
+                    self._weather_data.get_realtime_row, self._config[CONF_MAC]
+                )
+            hourly_rows = await self._weather_data.async_run(
+                self._weather_data.get_forecast_rows, True
             )
+            # When the daily forecast is derived, the table is read again with
+            # new hours, and at least every FORECAST_DAILY_MAX_AGE seconds in
+            # case Meteobridge writes it separately from the hourly table.
+            hourly_changed = hourly_rows != self._hourly_rows
+            if (
+                derive
+                and not hourly_changed
+                and self._daily_derived
+                and time.monotonic() - self._daily_read < FORECAST_DAILY_MAX_AGE
+            ):
+                daily_rows = self._daily_rows
+            else:
+                daily_rows = await self._weather_data.async_run(
+                    self._weather_data.get_forecast_rows, False
+                )
+                self._daily_read = time.monotonic()
         except MeteobridgeSQLDatabaseConnectionError as unauthorized:
             _LOGGER.debug(unauthorized)
             raise Unauthorized from unauthorized
@@ -165,4 +351,43 @@ class MeteobridgeSQLData:
             _LOGGER.debug(notreadyerror)
             raise ConfigEntryNotReady from notreadyerror
 
+        # Update the snapshot in place and only rebuild the forecasts when their
+        # rows changed, so a quiet refresh allocates next to nothing.
+        self.sensor_data.update(row)
+        if hourly_changed:
+            self._hourly_rows = hourly_rows
+            self.hourly_forecast = [ForecastHourly(*row) for row in hourly_rows]
+            self.hourly_generation += 1
+        if (
+            daily_rows != self._daily_rows
+            or derive != self._daily_derived
+            or (derive and hourly_changed)
+        ):
+            self._daily_rows = daily_rows
+            self._daily_derived = derive
+            self.daily_forecast = [ForecastDaily(*row) for row in daily_rows]
+            if derive:
+                self.daily_forecast = daily_from_hourly(
+                    self.hourly_forecast, self.daily_forecast
+                )
+            self.daily_generation += 1
+
+        _LOGGER.debug(
+            "Database executor: %s jobs, %s pending (max %s), queued %.1f ms on average (max %.1f ms)",
+            executor.jobs,
+            executor.pending,
+            executor.max_pending,
+            executor.mean_queue_time * 1000,
+            executor.max_queue_time * 1000,
+        )
+        if (compression := self._weather_data.compression) is not None:
+            _LOGGER.debug(
+                "Compressed protocol: sent %s bytes as %s, received %s bytes as %s, saved %s bytes",
+                compression.sent_raw,
+                compression.sent_wire,
+                compression.received_raw,
+                compression.received_wire,
+                compression.saved,
+            )
+
         return self
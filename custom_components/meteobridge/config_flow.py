@@ -13,23 +13,41 @@ from homeassistant.const import (
     CONF_PORT,
     CONF_USERNAME,
 )
+from homeassistant.components.sensor import SensorStateClass
 from homeassistant.core import callback
+from homeassistant.helpers import config_validation as cv
 from pymeteobridgesql import (
-    MeteobridgeSQL,
     MeteobridgeSQLDatabaseConnectionError,
     MeteobridgeSQLDataError,
-    StationData,
+    RealtimeData,
 )
 from .const import (
+    CONF_COMPRESSION,
+    CONF_DAILY_FROM_HOURLY,
     CONF_DATABASE,
+    CONF_REPLICA,
+    CONF_STATISTICS,
     CONF_UPDATE_INTERVAL,
+    DATA_HANDOFF,
+    DEFAULT_COMPRESSION,
+    DEFAULT_DAILY_FROM_HOURLY,
     DEFAULT_PORT,
+    DEFAULT_REPLICA,
     DEFAULT_UPDATE_INTERVAL,
     DOMAIN,
 )
+from .database import MeteobridgeSQLDatabase, ValidatedConnection, parse_hosts
+from .sensor import SENSOR_TYPES
 
 _LOGGER = logging.getLogger(__name__)
 
+# Sensors whose samples can be downsampled into long-term statistics.
+STATISTICS_SENSORS = {
+    description.key: description.name
+    for description in SENSOR_TYPES
+    if description.state_class == SensorStateClass.MEASUREMENT
+}
+
 
 class MeteobridgeSQLConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     """Config Flow for MeteobridgeSQL."""
@@ -52,32 +70,49 @@ class MeteobridgeSQLConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             return await self._show_setup_form(user_input)
 
         errors = {}
+        await self.async_set_unique_id(user_input[CONF_MAC])
+        self._abort_if_unique_id_configured()
+
         try:
-            meteobridge = MeteobridgeSQL(
-                host=user_input[CONF_HOST],
-                user=user_input[CONF_USERNAME],
-                password=user_input[CONF_PASSWORD],
-                database=user_input[CONF_DATABASE],
-            )
-            await self.hass.async_add_executor_job(meteobridge.initialize)
-            station_data: StationData = await meteobridge.async_get_station_data(
-                user_input[CONF_MAC]
+            parse_hosts(user_input[CONF_HOST], user_input[CONF_PORT])
+        except ValueError:
+            errors["base"] = "invalid_host"
+            return await self._show_setup_form(errors)
+
+        meteobridge = MeteobridgeSQLDatabase(
+            host=user_input[CONF_HOST],
+            user=user_input[CONF_USERNAME],
+            password=user_input[CONF_PASSWORD],
+            database=user_input[CONF_DATABASE],
+            port=user_input[CONF_PORT],
+            compress=user_input[CONF_COMPRESSION],
+        )
+        try:
+            await meteobridge.executor.async_run(meteobridge.initialize)
+            row = await meteobridge.executor.async_run(
+                meteobridge.get_realtime_row, user_input[CONF_MAC]
             )
 
         except MeteobridgeSQLDatabaseConnectionError as error:
             _LOGGER.error("Error connecting to MySQL Database: %s", error)
+            await meteobridge.async_shutdown()
             errors["base"] = "cannot_connect"
             return await self._show_setup_form(errors)
         except MeteobridgeSQLDataError as error:
             _LOGGER.error("Failed to lookup data in the database: %s", error)
+            await meteobridge.async_shutdown()
             errors["base"] = "no_data"
             return await self._show_setup_form(errors)
 
-        await self.async_set_unique_id(user_input[CONF_MAC])
-        self._abort_if_unique_id_configured
+        # Let the new entry start on this connection instead of opening another.
+        handoffs = self.hass.data.setdefault(DATA_HANDOFF, {})
+        if (stale := handoffs.pop(user_input[CONF_MAC], None)) is not None:
+            await stale.database.async_shutdown()
+        handoffs[user_input[CONF_MAC]] = ValidatedConnection(meteobridge, row)
+        realtime = RealtimeData(*row)
 
         return self.async_create_entry(
-            title=f"Meteobride SQL ({station_data.mb_stationname})",
+            title=f"Meteobride SQL ({realtime.mb_stationname})",
             data={
                 CONF_MAC: user_input[CONF_MAC],
                 CONF_HOST: user_input[CONF_HOST],
@@ -86,6 +121,10 @@ class MeteobridgeSQLConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                 CONF_PASSWORD: user_input[CONF_PASSWORD],
                 CONF_DATABASE: user_input[CONF_DATABASE],
                 CONF_UPDATE_INTERVAL: user_input[CONF_UPDATE_INTERVAL],
+                CONF_COMPRESSION: user_input[CONF_COMPRESSION],
+                CONF_REPLICA: user_input[CONF_REPLICA],
+                CONF_STATISTICS: user_input[CONF_STATISTICS],
+                CONF_DAILY_FROM_HOURLY: user_input[CONF_DAILY_FROM_HOURLY],
             },
         )
 
@@ -104,6 +143,14 @@ class MeteobridgeSQLConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                     vol.Required(
                         CONF_UPDATE_INTERVAL, default=DEFAULT_UPDATE_INTERVAL
                     ): vol.All(vol.Coerce(int), vol.In([15, 30, 45, 60])),
+                    vol.Required(CONF_COMPRESSION, default=DEFAULT_COMPRESSION): bool,
+                    vol.Required(CONF_REPLICA, default=DEFAULT_REPLICA): bool,
+                    vol.Optional(CONF_STATISTICS, default=[]): cv.multi_select(
+                        STATISTICS_SENSORS
+                    ),
+                    vol.Required(
+                        CONF_DAILY_FROM_HOURLY, default=DEFAULT_DAILY_FROM_HOURLY
+                    ): bool,
                 }
             ),
             errors=errors or {},
@@ -120,13 +167,19 @@ class MeteobridgeSQLOptionsFlowHandler(config_entries.OptionsFlow):
     async def async_step_init(self, user_input: dict[str, Any] | None = None):
         """Configure Options for WeatherFlow Forecast."""
 
+        errors = {}
         if user_input is not None:
-            self.hass.config_entries.async_update_entry(
-                self._config_entry, data=user_input
-            )
-            return self.async_create_entry(title="", data={})
-
-        data = self._config_entry.data
+            try:
+                parse_hosts(user_input[CONF_HOST], user_input[CONF_PORT])
+            except ValueError:
+                errors["base"] = "invalid_host"
+            else:
+                self.hass.config_entries.async_update_entry(
+                    self._config_entry, data=user_input
+                )
+                return self.async_create_entry(title="", data={})
+
+        data = user_input or self._config_entry.data
         return self.async_show_form(
             step_id="init",
             data_schema=vol.Schema(
@@ -149,6 +202,23 @@ class MeteobridgeSQLOptionsFlowHandler(config_entries.OptionsFlow):
                         CONF_UPDATE_INTERVAL,
                         default=data.get(CONF_UPDATE_INTERVAL, DEFAULT_UPDATE_INTERVAL),
                     ): vol.All(vol.Coerce(int), vol.In([15, 30, 45, 60])),
+                    vol.Required(
+                        CONF_COMPRESSION,
+                        default=data.get(CONF_COMPRESSION, DEFAULT_COMPRESSION),
+                    ): bool,
+                    vol.Required(
+                        CONF_REPLICA, default=data.get(CONF_REPLICA, DEFAULT_REPLICA)
+                    ): bool,
+                    vol.Optional(
+                        CONF_STATISTICS, default=data.get(CONF_STATISTICS, [])
+                    ): cv.multi_select(STATISTICS_SENSORS),
+                    vol.Required(
+                        CONF_DAILY_FROM_HOURLY,
+                        default=data.get(
+                            CONF_DAILY_FROM_HOURLY, DEFAULT_DAILY_FROM_HOURLY
+                        ),
+                    ): bool,
                 }
             ),
+            errors=errors,
         )
@@ -13,23 +13,71 @@ https://github.com/briis/meteobridgesql/issues
 """
 
 ATTR_ATTRIBUTION = "Data provided by Meteobridge"
+ATTR_CYCLES = "cycles"
+ATTR_END = "end"
 ATTR_MAX_SOLARRAD_TODAY = "max_solar_radiation_today"
 ATTR_MAX_TEMP_TODAY = "max_temperature_today"
 ATTR_MAX_UV_TODAY = "max_uv_today"
 ATTR_MIN_TEMP_TODAY = "min_temperature_today"
 ATTR_PRESSURE_TREND = "pressure_trend"
+ATTR_START = "start"
+ATTR_STATION = "station"
+ATTR_TABLE = "table"
 ATTR_TEMP_15_MIN = "temperature_15_min_ago"
+ATTR_TOP = "top"
 ATTR_WEATHER_ATTRIBUTION = "Data provided by Visual Crossing"
 
 CONCENTRATION_GRAMS_PER_CUBIC_METER = "g/m³"
+CONF_COMPRESSION = "compression"
+CONF_DAILY_FROM_HOURLY = "daily_from_hourly"
 CONF_DATABASE = "database"
+CONF_REPLICA = "replica"
+CONF_STATISTICS = "statistics"
 CONF_UPDATE_INTERVAL = "update_interval"
+CONNECT_TIMEOUT = 10
 
+DATA_HANDOFF = "meteobridge_handoff"
+DATA_PROFILER = "meteobridge_profiler"
+DATA_SCHEDULER = "meteobridge_scheduler"
+DB_EXECUTOR_WORKERS = 1
+
+DEFAULT_COMPRESSION = False
+DEFAULT_DAILY_FROM_HOURLY = False
 DEFAULT_PORT = 3306
+DEFAULT_PROFILE_CYCLES = 5
+DEFAULT_PROFILE_TOP = 20
+DEFAULT_REPLICA = False
 DEFAULT_UPDATE_INTERVAL = 60
 DOMAIN = "meteobridge"
 
+EXPORT_BATCH_SIZE = 5000
+
+# Seconds the daily forecast table is reused for while the hourly one is unchanged.
+FORECAST_DAILY_MAX_AGE = 600
+
+HOST_CHECK_INTERVAL = 60
+HOST_CHECK_TIMEOUT = 2
+# Seconds a host must be faster by before the connection moves to it.
+HOST_LATENCY_MARGIN = 0.005
+HOST_MAX_QUERIES = 2
+
 MANUFACTURER = "Meteobridge"
 
+# A profile is stopped after this many times the time its refreshes should take.
+PROFILE_TIMEOUT_FACTOR = 2
+
+QUERY_TIMEOUT = 30
+
+REPLICA_BATCH_SIZE = 500
+REPLICA_FILENAME = "meteobridge_replica.db"
+REPLICA_SYNC_INTERVAL = 300
+
+SCHEDULE_JITTER = 0.25
+
+SERVICE_EXPORT = "export"
+SERVICE_PROFILE = "profile"
+
+STATISTICS_PERIOD = 300
+
 WEATHER_MANUFATURER = "Visual Crossing"
 WEATHER_MODEL = "Forecast"
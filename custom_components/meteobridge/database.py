@@ -0,0 +1,435 @@
+"""MySQL access layer for Meteobridge SQL."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable
+from contextlib import AbstractAsyncContextManager, nullcontext
+from dataclasses import dataclass
+import logging
+from threading import Lock, local
+import time
+from types import FunctionType
+from typing import Any, TypeVar
+
+import mysql.connector
+from mysql.connector import network
+from mysql.connector.abstracts import MySQLConnectionAbstract, MySQLCursorAbstract
+from pymeteobridgesql import (
+    MeteobridgeSQL,
+    MeteobridgeSQLDatabaseConnectionError,
+    MeteobridgeSQLDataError,
+)
+
+from .const import (
+    CONNECT_TIMEOUT,
+    DEFAULT_PORT,
+    HOST_CHECK_TIMEOUT,
+    HOST_LATENCY_MARGIN,
+    QUERY_TIMEOUT,
+)
+from .executor import DatabaseExecutor
+
+try:
+    from zlib_ng import zlib_ng as fast_zlib
+except ImportError:
+    try:
+        from isal import isal_zlib as fast_zlib
+    except ImportError:
+        import zlib as fast_zlib
+
+_LOGGER = logging.getLogger(__name__)
+
+_T = TypeVar("_T")
+
+# The statements that run on every refresh. The connector only reuses a
+# prepared statement when it is handed the very same string object, so these
+# must stay module level constants.
+SQL_REALTIME = "SELECT * FROM realtime_data WHERE ID = %s"
+SQL_FORECAST_DAILY = "SELECT * FROM forecast_daily"
+SQL_FORECAST_HOURLY = "SELECT * FROM forecast_hourly WHERE `datetime` >= NOW() LIMIT 48"
+
+# Errors raised by the connector when the server connection has gone away.
+CONNECTION_LOST_ERRORS = (
+    mysql.connector.InterfaceError,
+    mysql.connector.OperationalError,
+)
+
+# Counters of the connection currently talking to the server on this thread.
+_active = local()
+
+
+@dataclass
+class CompressionCounters:
+    """Bytes passed through the compressed MySQL protocol."""
+
+    sent_raw: int = 0
+    sent_wire: int = 0
+    received_raw: int = 0
+    received_wire: int = 0
+
+    @property
+    def saved(self) -> int:
+        """Return the number of bytes compression kept off the wire."""
+        return self.sent_raw + self.received_raw - self.sent_wire - self.received_wire
+
+
+@dataclass
+class DatabaseHost:
+    """MySQL server holding a copy of the Meteobridge database."""
+
+    host: str
+    port: int
+    # Ping round trip of the last health check, None while unknown or down.
+    latency: float | None = None
+
+    def __str__(self) -> str:
+        """Return the host as it is configured."""
+        return f"{self.host}:{self.port}"
+
+
+def parse_hosts(hosts: str, port: int = DEFAULT_PORT) -> list[DatabaseHost]:
+    """Parse a comma separated list of hosts, each with an optional port."""
+    parsed = []
+    for item in hosts.split(","):
+        if not (item := item.strip()):
+            continue
+        if item.startswith("["):
+            host, _, host_port = item[1:].partition("]")
+            host_port = host_port.removeprefix(":")
+        elif item.count(":") == 1:
+            host, _, host_port = item.partition(":")
+        else:
+            host, host_port = item, ""
+        parsed.append(DatabaseHost(host, int(host_port) if host_port else port))
+    if not parsed:
+        raise ValueError("No database host given")
+    return parsed
+
+
+class _CountingZlib:
+    """Drop-in for the connector's zlib module using the fast implementation."""
+
+    @staticmethod
+    def compress(data: bytes) -> bytes:
+        """Compress an outgoing packet."""
+        compressed = fast_zlib.compress(data)
+        if (counters := getattr(_active, "counters", None)) is not None:
+            counters.sent_raw += len(data)
+            counters.sent_wire += len(compressed)
+        return compressed
+
+    @staticmethod
+    def decompress(data: bytes) -> bytes:
+        """Decompress an incoming packet."""
+        decompressed = fast_zlib.decompress(data)
+        if (counters := getattr(_active, "counters", None)) is not None:
+            counters.received_raw += len(decompressed)
+            counters.received_wire += len(data)
+        return decompressed
+
+
+def _with_counting_zlib(function: Any) -> Any:
+    """Return a copy of a connector function that uses _CountingZlib as zlib."""
+    return FunctionType(
+        function.__code__,
+        {**vars(network), "zlib": _CountingZlib},
+        function.__name__,
+        function.__defaults__,
+        function.__closure__,
+    )
+
+
+class _CountingNetworkBroker(network.NetworkBrokerCompressed):
+    """Compressed packet handling of the connector, with the fast zlib.
+
+    Only this integration's connections are switched to it, other users of
+    mysql-connector keep the standard zlib. The fast implementation produces
+    different, equally valid, compressed bytes than zlib.
+    """
+
+    _send_pkt = _with_counting_zlib(network.NetworkBrokerCompressed._send_pkt)
+    _recv_compressed_pkt = _with_counting_zlib(
+        network.NetworkBrokerCompressed._recv_compressed_pkt
+    )
+
+
+class MeteobridgeSQLDatabase(MeteobridgeSQL):
+    """MeteobridgeSQL connection that keeps its recurring statements prepared."""
+
+    def __init__(
+        self,
+        host: str,
+        user: str,
+        password: str,
+        database: str,
+        port: int = DEFAULT_PORT,
+        compress: bool = False,
+    ) -> None:
+        """Initialize the connection settings."""
+        super().__init__(host, user, password, database, port)
+        self._connection: MySQLConnectionAbstract | None = None
+        self._statements: dict[str, MySQLCursorAbstract] = {}
+        self._lock = Lock()
+        # One worker matches the single connection the jobs are serialized on.
+        self.executor = DatabaseExecutor()
+        # Semaphore of a server, shared by every connection querying it.
+        self.host_limit: Callable[[str], asyncio.Semaphore] | None = None
+        self._configure(host, user, password, database, port, compress)
+
+    @property
+    def settings(self) -> dict[str, Any]:
+        """Return the settings connections are opened with."""
+        return {
+            **self._connect_args,
+            "hosts": [(host.host, host.port) for host in self.hosts],
+        }
+
+    def initialize(self) -> None:
+        """Open the connection, dropping statements prepared on an earlier one.
+
+        Hosts are tried fastest first, with hosts that are down or not yet
+        checked after the healthy ones in the order they were configured.
+        """
+        self.close()
+        errors = []
+        for host in self._hosts_by_preference():
+            try:
+                connection = mysql.connector.connect(
+                    **self._connect_args, host=host.host, port=host.port
+                )
+                if self.compression is not None:
+                    # The pure Python connection switched to its compressed
+                    # broker during the handshake, which is swapped in place.
+                    broker = connection._socket._netbroker
+                    if type(broker) is network.NetworkBrokerCompressed:
+                        broker.__class__ = _CountingNetworkBroker
+                cursor = connection.cursor()
+            except mysql.connector.Error as err:
+                host.latency = None
+                errors.append(f"{host}: {err.msg}")
+                continue
+            break
+        else:
+            raise MeteobridgeSQLDatabaseConnectionError(
+                f"Failed to connect to the database: {', '.join(errors)}"
+            )
+
+        if errors:
+            _LOGGER.warning(
+                "Connected to %s after failing to reach %s", host, ", ".join(errors)
+            )
+        self.host = host
+        self._connection = connection
+        # Keep the library's own queries (station data, archive tables) working.
+        self._weatherdb = connection
+        self._weather_cursor = cursor
+
+    def reconfigure(
+        self,
+        host: str,
+        user: str,
+        password: str,
+        database: str,
+        port: int = DEFAULT_PORT,
+        compress: bool = False,
+    ) -> None:
+        """Switch to new connection settings, reconnecting on the next query."""
+        with self._lock:
+            self.close()
+            self._configure(host, user, password, database, port, compress)
+
+    def close(self) -> None:
+        """Close prepared statements and the connection."""
+        cursors = [*self._statements.values()]
+        if self._weather_cursor is not None:
+            cursors.append(self._weather_cursor)
+        connection = self._connection
+        self._statements = {}
+        self._connection = self._weatherdb = self._weather_cursor = None
+        self.host = None
+        if connection is None:
+            return
+
+        for cursor in cursors:
+            try:
+                cursor.close()
+            except mysql.connector.Error as err:
+                _LOGGER.debug("Failed to close cursor: %s", err)
+        try:
+            connection.close()
+        except mysql.connector.Error as err:
+            _LOGGER.debug("Failed to close the database connection: %s", err)
+
+    def check_host(self, host: DatabaseHost) -> None:
+        """Measure the ping round trip of a host on a short-lived connection."""
+        try:
+            connection = mysql.connector.connect(
+                **{
+                    **self._connect_args,
+                    "host": host.host,
+                    "port": host.port,
+                    "connection_timeout": HOST_CHECK_TIMEOUT,
+                }
+            )
+        except mysql.connector.Error as err:
+            _LOGGER.debug("Health check of %s failed: %s", host, err)
+            host.latency = None
+            return
+
+        try:
+            start = time.perf_counter()
+            connection.ping()
+            host.latency = time.perf_counter() - start
+        except mysql.connector.Error as err:
+            _LOGGER.debug("Health check of %s failed: %s", host, err)
+            host.latency = None
+        finally:
+            connection.close()
+
+    def prefer_fastest_host(self) -> None:
+        """Move to the fastest healthy host on the next query if it is clearly faster."""
+        healthy = [host for host in self.hosts if host.latency is not None]
+        if not healthy:
+            return
+        fastest = min(healthy, key=lambda host: host.latency or 0)
+        with self._lock:
+            current = self.host
+            if current is None or current is fastest:
+                return
+            if (
+                current.latency is None
+                or fastest.latency + HOST_LATENCY_MARGIN < current.latency
+            ):
+                _LOGGER.debug("Switching from %s to the faster %s", current, fastest)
+                self.close()
+
+    def limit(
+        self, host: DatabaseHost | None = None
+    ) -> AbstractAsyncContextManager[Any]:
+        """Return the concurrency limit of a host, by default the one queried next."""
+        if self.host_limit is None:
+            return nullcontext()
+        return self.host_limit(str(host or self.host or self._hosts_by_preference()[0]))
+
+    async def async_run(self, target: Callable[..., _T], *args: Any) -> _T:
+        """Run a query job on the executor, within the limit of its host."""
+        async with self.limit():
+            return await self.executor.async_run(target, *args)
+
+    async def async_shutdown(self) -> None:
+        """Close the connection and stop the executor for good."""
+        await self.executor.async_run(self.close)
+        self.executor.shutdown()
+
+    def get_realtime_row(self, mac: str) -> tuple[Any, ...]:
+        """Get the latest realtime row of a station."""
+        _, rows = self._execute(SQL_REALTIME, (mac,))
+        if not rows:
+            raise MeteobridgeSQLDataError(f"No realtime data found for station {mac}")
+
+        return rows[0]
+
+    def get_forecast_rows(self, hourly: bool = False) -> list[tuple[Any, ...]]:
+        """Get the latest daily or hourly forecast rows."""
+        _, rows = self._execute(SQL_FORECAST_HOURLY if hourly else SQL_FORECAST_DAILY)
+        return rows
+
+    def query(
+        self, sql: str, params: tuple[Any, ...] = ()
+    ) -> tuple[list[str], list[tuple[Any, ...]]]:
+        """Run a prepared statement and return its column names and rows."""
+        return self._execute(sql, params)
+
+    def _configure(
+        self,
+        host: str,
+        user: str,
+        password: str,
+        database: str,
+        port: int,
+        compress: bool,
+    ) -> None:
+        """Set the arguments new connections are opened with."""
+        self.hosts = parse_hosts(host, port)
+        self.host: DatabaseHost | None = None
+        self._host = self.hosts[0].host
+        self._user = user
+        self._password = password
+        self._database = database
+        self._port = self.hosts[0].port
+        self._connect_args: dict[str, Any] = {
+            "user": user,
+            "password": password,
+            "database": database,
+            # Bound every connect and query so an unreachable host fails fast.
+            "connection_timeout": CONNECT_TIMEOUT,
+            "read_timeout": QUERY_TIMEOUT,
+            "write_timeout": QUERY_TIMEOUT,
+        }
+        self.compression: CompressionCounters | None = None
+        if compress:
+            # Protocol compression goes through the pure Python connector so
+            # packets are (de)compressed by the fast zlib implementation. The
+            # price is that rows are decoded in Python instead of by the C
+            # extension, which costs CPU on every query.
+            self._connect_args.update(compress=True, use_pure=True)
+            self.compression = CompressionCounters()
+
+    def _hosts_by_preference(self) -> list[DatabaseHost]:
+        """Return the hosts in the order connections try them."""
+        return sorted(
+            self.hosts, key=lambda host: (host.latency is None, host.latency or 0)
+        )
+
+    def _statement(self, sql: str) -> MySQLCursorAbstract:
+        """Return the prepared cursor for a statement, creating it on first use."""
+        if (cursor := self._statements.get(sql)) is None:
+            assert self._connection is not None
+            cursor = self._statements[sql] = self._connection.cursor(prepared=True)
+        return cursor
+
+    def _execute(
+        self, sql: str, params: tuple[Any, ...] = ()
+    ) -> tuple[list[str], list[tuple[Any, ...]]]:
+        """Run a prepared statement, reconnecting once if the link was lost."""
+        with self._lock:
+            _active.counters = self.compression
+            try:
+                if self._connection is None:
+                    self.initialize()
+                try:
+                    return self._run(sql, params)
+                except CONNECTION_LOST_ERRORS as err:
+                    # Fail over right away, retrying this host only if all
+                    # other hosts are down too.
+                    _LOGGER.debug(
+                        "Connection to %s lost, reconnecting: %s", self.host, err
+                    )
+                    if self.host is not None:
+                        self.host.latency = None
+                    self.initialize()
+                    return self._run(sql, params)
+            except mysql.connector.Error as err:
+                raise MeteobridgeSQLDataError(
+                    f"Failed to lookup data in the database: {err.msg}"
+                ) from err
+            finally:
+                _active.counters = None
+
+    def _run(
+        self, sql: str, params: tuple[Any, ...]
+    ) -> tuple[list[str], list[tuple[Any, ...]]]:
+        """Execute a statement on its prepared cursor and fetch all rows."""
+        cursor = self._statement(sql)
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+        return list(cursor.column_names), rows
+
+
+@dataclass
+class ValidatedConnection:
+    """Connection the config flow opened, handed over to the first refresh."""
+
+    database: MeteobridgeSQLDatabase
+    row: tuple[Any, ...]
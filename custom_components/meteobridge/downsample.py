@@ -0,0 +1,205 @@
+"""Downsampling of realtime samples into long-term statistics."""
+
+from __future__ import annotations
+
+from collections.abc import Callable, Iterable
+from dataclasses import asdict, dataclass
+from datetime import datetime
+import math
+from typing import Any
+
+from homeassistant.components.recorder.models import (
+    StatisticData,
+    StatisticMeanType,
+    StatisticMetaData,
+)
+from homeassistant.components.recorder.statistics import (
+    async_add_external_statistics,
+)
+from homeassistant.components.sensor import SensorEntityDescription
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN, STATISTICS_PERIOD
+from .snapshot import RealtimeSnapshot
+
+STORAGE_VERSION = 1
+
+
+def _hour(start: datetime) -> datetime:
+    """Return the start of the hour a period belongs to."""
+    return start.replace(minute=0, second=0)
+
+
+@dataclass
+class StatisticsBucket:
+    """Samples of one sensor within one period."""
+
+    count: int = 0
+    total: float = 0.0
+    min: float = math.inf
+    max: float = -math.inf
+
+    @property
+    def mean(self) -> float:
+        """Return the mean of the samples."""
+        return self.total / self.count
+
+    def add(self, value: float) -> None:
+        """Add a sample."""
+        self.count += 1
+        self.total += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def merge(self, other: StatisticsBucket) -> None:
+        """Add the samples of another bucket."""
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+
+class MeteobridgeSQLDownsampler:
+    """Aggregate realtime samples into 5 minute and hourly mean, min and max.
+
+    The 5 minute means become the sensor states, and the hourly buckets are
+    published as external statistics, which the recorder only accepts for
+    whole hours. Publishing an hour again replaces it, so the open buckets are
+    stored and restored across reloads and restarts, and a republished hour
+    still holds the samples from before.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        mac: str,
+        name: str,
+        descriptions: Iterable[SensorEntityDescription],
+    ) -> None:
+        """Initialize the downsampler."""
+        self.hass = hass
+        station = mac.replace(":", "").lower()
+        self._metadata: dict[str, StatisticMetaData] = {
+            description.key: {
+                "mean_type": StatisticMeanType.ARITHMETIC,
+                "has_sum": False,
+                "name": f"{name} {description.name}",
+                "source": DOMAIN,
+                "statistic_id": f"{DOMAIN}:{station}_{description.key}",
+                "unit_of_measurement": description.native_unit_of_measurement,
+            }
+            for description in descriptions
+        }
+        self.means: dict[str, float] = {}
+        self._generation: int | None = None
+        self._start: datetime | None = None
+        self._period: dict[str, StatisticsBucket] = {}
+        self._hour: dict[str, StatisticsBucket] = {}
+        self._listeners: list[Callable[[], None]] = []
+        self._store: Store[dict[str, Any]] = Store(
+            hass, STORAGE_VERSION, f"{DOMAIN}.{station}_statistics"
+        )
+
+    @callback
+    def async_add_listener(self, update_callback: Callable[[], None]) -> CALLBACK_TYPE:
+        """Call back every time a period has been closed."""
+        self._listeners.append(update_callback)
+
+        @callback
+        def remove_listener() -> None:
+            self._listeners.remove(update_callback)
+
+        return remove_listener
+
+    @callback
+    def async_add_sample(self, data: RealtimeSnapshot) -> None:
+        """Add the latest realtime values, closing the period they follow.
+
+        A snapshot that has not changed since the last sample is skipped, so
+        values repeated by failed or unchanged refreshes do not skew the means.
+        """
+        if data.generation == self._generation:
+            return
+        self._generation = data.generation
+        now = dt_util.utcnow().timestamp()
+        start = dt_util.utc_from_timestamp(now - now % STATISTICS_PERIOD)
+        if start != self._start:
+            self._async_close_period()
+            if self._start is not None and _hour(self._start) != _hour(start):
+                self._async_publish_hour(_hour(self._start))
+            self._start = start
+
+        for key in self._metadata:
+            if (value := getattr(data, key, None)) is not None:
+                self._period.setdefault(key, StatisticsBucket()).add(float(value))
+        # Written at the latest when Home Assistant stops.
+        self._store.async_delay_save(self._data_to_save, STATISTICS_PERIOD)
+
+    async def async_restore(self) -> None:
+        """Restore the buckets that were open when the station was unloaded."""
+        if (data := await self._store.async_load()) is None:
+            return
+
+        def buckets(stored: dict[str, dict[str, float]]) -> dict[str, StatisticsBucket]:
+            # Sensors no longer downsampled are dropped.
+            return {
+                key: StatisticsBucket(**bucket)
+                for key, bucket in stored.items()
+                if key in self._metadata
+            }
+
+        self._start = dt_util.parse_datetime(data["start"])
+        self.means = {
+            key: mean for key, mean in data["means"].items() if key in self._metadata
+        }
+        self._period = buckets(data["period"])
+        self._hour = buckets(data["hour"])
+
+    async def async_flush(self) -> None:
+        """Publish what has been collected of the current hour and store it."""
+        if self._start is None:
+            return
+        self._async_close_period()
+        self._async_publish_hour(_hour(self._start), clear=False)
+        await self._store.async_save(self._data_to_save())
+
+    @callback
+    def _data_to_save(self) -> dict[str, Any]:
+        """Return the open buckets to store."""
+        assert self._start is not None
+        return {
+            "start": self._start.isoformat(),
+            "means": self.means,
+            "period": {key: asdict(bucket) for key, bucket in self._period.items()},
+            "hour": {key: asdict(bucket) for key, bucket in self._hour.items()},
+        }
+
+    @callback
+    def _async_close_period(self) -> None:
+        """Fold the current period into the hour and update the sensor states."""
+        if not self._period:
+            return
+        for key, bucket in self._period.items():
+            self.means[key] = bucket.mean
+            self._hour.setdefault(key, StatisticsBucket()).merge(bucket)
+        self._period = {}
+        for update_callback in list(self._listeners):
+            update_callback()
+
+    @callback
+    def _async_publish_hour(self, start: datetime, clear: bool = True) -> None:
+        """Publish the hourly statistics, keeping the buckets if not clear."""
+        for key, bucket in self._hour.items():
+            async_add_external_statistics(
+                self.hass,
+                self._metadata[key],
+                [
+                    StatisticData(
+                        start=start, mean=bucket.mean, min=bucket.min, max=bucket.max
+                    )
+                ],
+            )
+        if clear:
+            self._hour = {}
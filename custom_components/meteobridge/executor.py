@@ -0,0 +1,61 @@
+"""Dedicated executor for the blocking MySQL work of a connection."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+import time
+from typing import Any, TypeVar
+
+from .const import DB_EXECUTOR_WORKERS, DOMAIN
+
+_T = TypeVar("_T")
+
+
+class DatabaseExecutor:
+    """Bounded thread pool running the jobs of one database connection.
+
+    Keeping the jobs off Home Assistant's shared executor means a slow or
+    unreachable server only backs up this queue, not every other integration.
+    """
+
+    def __init__(self, workers: int = DB_EXECUTOR_WORKERS) -> None:
+        """Initialize the executor, its threads are started on first use."""
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix=f"{DOMAIN}_db"
+        )
+        self.pending = 0
+        self.max_pending = 0
+        self.jobs = 0
+        self.queue_time = 0.0
+        self.max_queue_time = 0.0
+
+    @property
+    def mean_queue_time(self) -> float:
+        """Return the average time a job waited for a worker, in seconds."""
+        return self.queue_time / self.jobs if self.jobs else 0.0
+
+    async def async_run(self, target: Callable[..., _T], *args: Any) -> _T:
+        """Run a blocking job and return its result."""
+        queued = time.monotonic()
+
+        def _job() -> _T:
+            waited = time.monotonic() - queued
+            self.queue_time += waited
+            self.max_queue_time = max(self.max_queue_time, waited)
+            return target(*args)
+
+        self.pending += 1
+        self.max_pending = max(self.max_pending, self.pending)
+        try:
+            return await asyncio.get_running_loop().run_in_executor(
+                self._executor, _job
+            )
+        finally:
+            self.pending -= 1
+            self.jobs += 1
+
+    def shutdown(self) -> None:
+        """Stop the threads once the queued jobs are done."""
+        self._executor.shutdown(wait=False)
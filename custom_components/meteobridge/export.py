@@ -0,0 +1,227 @@
+"""Streaming export of the Meteobridge archive tables."""
+
+from __future__ import annotations
+
+import contextlib
+import csv
+from datetime import datetime
+import logging
+import os
+from typing import IO, Any
+
+from pymeteobridgesql import (
+    MeteobridgeSQLDatabaseConnectionError,
+    MeteobridgeSQLDataError,
+)
+
+from homeassistant.core import HomeAssistant
+
+from .const import EXPORT_BATCH_SIZE
+from .database import MeteobridgeSQLDatabase
+from .replica import MeteobridgeSQLReplica
+
+try:
+    from zlib_ng.gzip_ng import open as gzip_open
+except ImportError:
+    try:
+        from isal.igzip import open as gzip_open
+    except ImportError:
+        from gzip import open as gzip_open
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class ExportTable:
+    """Remote archive table and the statements paging through it."""
+
+    def __init__(self, name: str, source: str, time_column: str) -> None:
+        """Build the paging query for the table."""
+        self.name = name
+        # Keyset paging: later pages continue from the last exported time, so
+        # every page is a short indexed range scan instead of a growing OFFSET.
+        # The time is not unique, so pages start at it rather than after it.
+        select = f"SELECT * FROM {source} WHERE `{time_column}`"
+        rest = (
+            f"AND `{time_column}` < %s ORDER BY `{time_column}` "
+            f"LIMIT {EXPORT_BATCH_SIZE}"
+        )
+        self.sql = f"{select} >= %s {rest}"
+        # Used to get past a time shared by more rows than fit on a page.
+        self.at_sql = f"{select} = %s"
+        self.after_sql = f"{select} > %s {rest}"
+        self.time_column = time_column
+
+
+EXPORT_TABLES = {
+    table.name: table
+    for table in (
+        ExportTable("minute_data", "viewMinuteData", "logdate"),
+        ExportTable("daily_data", "viewDailyData", "logdate"),
+        ExportTable("monthly_data", "monthly_data", "logdate"),
+    )
+}
+
+
+class MeteobridgeSQLExport:
+    """Write a time range of an archive table to a gzip compressed CSV file."""
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        database: MeteobridgeSQLDatabase,
+        replica: MeteobridgeSQLReplica | None,
+        mac: str,
+        table: ExportTable,
+        start: datetime,
+        end: datetime,
+    ) -> None:
+        """Initialize the export."""
+        self.hass = hass
+        self._database = database
+        self._replica = replica
+        self._table = table
+        self._start = start
+        self._end = end
+        self.path = hass.config.path(
+            f"meteobridge_export_{mac.replace(':', '')}_{table.name}_"
+            f"{start:%Y%m%d%H%M}_{end:%Y%m%d%H%M}.csv.gz"
+        )
+        self.rows = 0
+        # Time from which rows are missing, when MySQL failed after the replica.
+        self.missing_from: datetime | None = None
+        self._partial = f"{self.path}.part"
+        self._file: IO[str] | None = None
+        self._writer: Any = None
+        self._columns: list[str] | None = None
+        self._mark: Any = start
+        # Rows at the mark that are already written.
+        self._boundary: set[tuple[Any, ...]] = set()
+        self._after = False
+
+    async def async_run(self) -> None:
+        """Stream the rows to the file, one short executor job per batch.
+
+        The range the local replica covers is read from it, only the rest
+        is read from MySQL. If MySQL fails, the rows read so far are kept and
+        missing_from tells where they end.
+        """
+        await self.hass.async_add_executor_job(self._open)
+        try:
+            split = self._start
+            if self._replica is not None:
+                covered = self._replica.covered_until(self._table.name)
+                split = min(max(covered, self._start), self._end)
+                after = False
+                while await self.hass.async_add_executor_job(
+                    self._write_local_batch, split, after
+                ):
+                    after = True
+
+            if split < self._end:
+                self._mark = split
+                try:
+                    while await self._database.async_run(self._write_batch):
+                        pass
+                except (
+                    MeteobridgeSQLDatabaseConnectionError,
+                    MeteobridgeSQLDataError,
+                ) as err:
+                    if self._replica is None:
+                        raise
+                    # Rows at the mark itself may be incomplete.
+                    self.missing_from = self._mark
+                    _LOGGER.warning(
+                        "Export of %s is missing the rows from %s on: %s",
+                        self._table.name,
+                        self.missing_from,
+                        err,
+                    )
+        except BaseException:
+            await self.hass.async_add_executor_job(self._discard)
+            raise
+
+        await self.hass.async_add_executor_job(self._finish)
+        _LOGGER.info("Exported %s rows to %s", self.rows, self.path)
+
+    def _open(self) -> None:
+        """Open the partial file the rows are written to."""
+        self._file = gzip_open(self._partial, "wt", encoding="utf-8", newline="")
+        self._writer = csv.writer(self._file)
+
+    def _write_local_batch(self, until: datetime, after: bool) -> bool:
+        """Write one batch of replicated rows, True if more rows are waiting."""
+        assert self._replica is not None
+        columns, rows = self._replica.get_batch(
+            self._table.name, self._mark, until, after, EXPORT_BATCH_SIZE
+        )
+        # The replica keeps one row per time, so paging after the mark is safe.
+        self._write_rows(columns, rows)
+        if rows:
+            self._mark = rows[-1][columns.index(self._table.time_column)]
+        return len(rows) == EXPORT_BATCH_SIZE
+
+    def _write_batch(self) -> bool:
+        """Write one batch of rows and return True if more rows are waiting."""
+        sql = self._table.after_sql if self._after else self._table.sql
+        self._after = False
+        columns, rows = self._database.query(sql, (self._mark, self._end))
+        if not rows:
+            self._write_rows(columns, rows)
+            return False
+
+        # The page starts with the rows at the mark again, skip those written.
+        new_rows = [row for row in rows if row not in self._boundary]
+        if not new_rows and len(rows) == EXPORT_BATCH_SIZE:
+            # A whole page of written rows at the mark, so paging from it
+            # cannot move on. Write the rest of that time at once, and
+            # continue after it.
+            columns, rows = self._database.query(self._table.at_sql, (self._mark,))
+            self._write_rows(
+                columns, [row for row in rows if row not in self._boundary]
+            )
+            self._boundary = set()
+            self._after = True
+            return True
+
+        self._write_rows(columns, new_rows)
+        time_index = columns.index(self._table.time_column)
+        mark = rows[-1][time_index]
+        if mark != self._mark:
+            self._boundary = set()
+        self._boundary.update(row for row in rows if row[time_index] == mark)
+        self._mark = mark
+        return len(rows) == EXPORT_BATCH_SIZE
+
+    def _write_rows(self, columns: list[str], rows: list[tuple[Any, ...]]) -> None:
+        """Write rows in the column order of the header."""
+        if self._columns is None:
+            self._columns = columns
+            self._writer.writerow(columns)
+        if not rows:
+            return
+
+        if columns != self._columns:
+            # Columns added remotely are appended to the replica's tables.
+            indexes = [
+                columns.index(column) if column in columns else None
+                for column in self._columns
+            ]
+            rows = [
+                tuple(None if index is None else row[index] for index in indexes)
+                for row in rows
+            ]
+        self._writer.writerows(rows)
+        self.rows += len(rows)
+
+    def _finish(self) -> None:
+        """Close the file and move it into place."""
+        assert self._file is not None
+        self._file.close()
+        os.replace(self._partial, self.path)
+
+    def _discard(self) -> None:
+        """Close and remove the partial file."""
+        if self._file is not None:
+            self._file.close()
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(self._partial)
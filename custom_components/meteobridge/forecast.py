@@ -0,0 +1,150 @@
+"""Daily forecast derived from the hourly forecast."""
+
+from __future__ import annotations
+
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import date, datetime
+import math
+
+from pymeteobridgesql import ForecastDaily, ForecastHourly
+
+HOURS_PER_DAY = 24
+
+
+@dataclass
+class _Values:
+    """Running total and maximum of the values present in the hourly rows.
+
+    Every result is None when no row had a value, rather than a made up 0.
+    """
+
+    total: float = 0.0
+    count: int = 0
+    highest: float | None = None
+
+    def add(self, value: float | None) -> None:
+        """Add a value, unless it is missing."""
+        if value is not None:
+            self.total += value
+            self.count += 1
+            self.highest = value if self.highest is None else max(self.highest, value)
+
+    def mean(self) -> float | None:
+        """Return the mean, rounded like the table."""
+        return round(self.total / self.count, 1) if self.count else None
+
+    def sum(self) -> float | None:
+        """Return the sum, rounded like the table."""
+        return round(self.total, 1) if self.count else None
+
+    def max(self) -> float | None:
+        """Return the highest value."""
+        return self.highest
+
+
+@dataclass
+class _Day:
+    """Running aggregate of the hourly rows of one day.
+
+    Columns can be NULL in single rows, so every field only aggregates the
+    rows that have a value for it.
+    """
+
+    hours: int = 0
+    high: float | None = None
+    low: float | None = None
+    precipitation: _Values = field(default_factory=_Values)
+    precipitation_probability: _Values = field(default_factory=_Values)
+    pressure: _Values = field(default_factory=_Values)
+    wind_speed: _Values = field(default_factory=_Values)
+    wind_gust: _Values = field(default_factory=_Values)
+    wind_x: float = 0.0
+    wind_y: float = 0.0
+    wind_vectors: int = 0
+    icons: Counter[str] = field(default_factory=Counter)
+    descriptions: dict[str, str] = field(default_factory=dict)
+
+    def add(self, hour: ForecastHourly) -> None:
+        """Add an hourly row."""
+        self.hours += 1
+        if (temperature := hour.temperature) is not None:
+            self.high = (
+                temperature if self.high is None else max(self.high, temperature)
+            )
+            self.low = temperature if self.low is None else min(self.low, temperature)
+        self.precipitation.add(hour.precipitation)
+        self.precipitation_probability.add(hour.precipitation_probability)
+        self.pressure.add(hour.pressure)
+        self.wind_speed.add(hour.wind_speed)
+        self.wind_gust.add(hour.wind_gust)
+        if hour.wind_bearing is not None and hour.wind_speed is not None:
+            # Bearings are averaged as vectors weighted by the wind speed.
+            bearing = math.radians(hour.wind_bearing)
+            self.wind_x += hour.wind_speed * math.sin(bearing)
+            self.wind_y += hour.wind_speed * math.cos(bearing)
+            self.wind_vectors += 1
+        if hour.icon is not None:
+            self.icons[hour.icon] += 1
+            self.descriptions.setdefault(hour.icon, hour.description)
+
+    def forecast(
+        self, day: date, first: date, table_row: ForecastDaily | None
+    ) -> ForecastDaily:
+        """Return the day as a daily forecast row, numbered like the table."""
+        assert self.high is not None and self.low is not None
+        day_num = table_row.day_num if table_row else (day - first).days
+        icon = self.icons.most_common(1)[0][0] if self.icons else None
+        description = self.descriptions.get(icon) if icon is not None else None
+        bearing = None
+        if self.wind_vectors:
+            bearing = round(math.degrees(math.atan2(self.wind_x, self.wind_y))) % 360
+        return ForecastDaily(
+            day_num=day_num,
+            datetime=datetime.combine(day, datetime.min.time()),
+            temperature=round(self.high, 1),
+            temp_low=round(self.low, 1),
+            description=description,
+            icon=icon,
+            precipitation_probability=self.precipitation_probability.max(),
+            precipitation=self.precipitation.sum(),
+            pressure=self.pressure.mean(),
+            sunriseepoch=table_row.sunriseepoch if table_row else None,
+            sunsetepoch=table_row.sunsetepoch if table_row else None,
+            wind_bearing=bearing,
+            wind_speed=self.wind_speed.mean(),
+            wind_gust=self.wind_gust.max(),
+            conditions=description,
+        )
+
+
+def daily_from_hourly(
+    hourly: list[ForecastHourly], daily: list[ForecastDaily]
+) -> list[ForecastDaily]:
+    """Return the daily forecast, computed from the hourly rows where possible.
+
+    Days the hourly forecast covers in full are aggregated in one pass over
+    the hourly rows. The daily table still provides the other days, i.e. the
+    rest of today and the days beyond the hourly horizon, as well as days
+    without a single temperature in the hourly rows.
+    """
+    if not hourly:
+        return daily
+
+    days: dict[date, _Day] = {}
+    for hour in hourly:
+        day = hour.datetime.date()
+        if (aggregate := days.get(day)) is None:
+            aggregate = days[day] = _Day()
+        aggregate.add(hour)
+
+    first = hourly[0].datetime.date()
+    table = {row.datetime.date(): row for row in daily}
+    forecast = {
+        day: aggregate.forecast(day, first, table.get(day))
+        for day, aggregate in days.items()
+        if aggregate.hours == HOURS_PER_DAY and aggregate.high is not None
+    }
+    for day, row in table.items():
+        forecast.setdefault(day, row)
+    return [forecast[day] for day in sorted(forecast)]
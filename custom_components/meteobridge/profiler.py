@@ -0,0 +1,102 @@
+"""On-demand profiling of MeteobridgeSQL refresh cycles."""
+
+from __future__ import annotations
+
+import cProfile
+import io
+import logging
+import pstats
+from datetime import datetime
+import time
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.event import async_call_later
+
+from .const import DATA_PROFILER, DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class RefreshProfiler:
+    """Profile the event loop while all stations refresh a number of times.
+
+    A single profiler runs for the whole capture window, as only one profiler
+    can be active at a time, so it also records the entity writes the
+    refreshes cause and whatever else runs in between.
+    """
+
+    def __init__(self, hass: HomeAssistant, refreshes: int, top: int) -> None:
+        """Initialize the profiler."""
+        self.hass = hass
+        self._remaining = refreshes
+        self._top = top
+        self._profile = cProfile.Profile()
+        self._unsub_timeout: CALLBACK_TYPE | None = None
+
+    @callback
+    def async_start(self, timeout: float) -> None:
+        """Start collecting and register as the running profiler.
+
+        The capture ends after timeout seconds at the latest, in case the
+        stations stop refreshing before all refreshes are captured.
+        """
+        if DATA_PROFILER in self.hass.data:
+            raise HomeAssistantError("A profile is already being captured")
+        try:
+            self._profile.enable()
+        except ValueError as err:
+            # Python 3.12+ allows one active profiler, e.g. the profiler integration.
+            raise HomeAssistantError(
+                f"Cannot profile, another profiler is active: {err}"
+            ) from err
+        self.hass.data[DATA_PROFILER] = self
+        self._unsub_timeout = async_call_later(self.hass, timeout, self._async_timeout)
+
+    @callback
+    def refresh_done(self) -> None:
+        """Count a finished refresh, stopping once all refreshes are captured."""
+        self._remaining -= 1
+        if self._remaining == 0:
+            self._async_stop()
+
+    @callback
+    def _async_timeout(self, _now: datetime) -> None:
+        """Stop a capture the stations did not finish in time."""
+        self._unsub_timeout = None
+        _LOGGER.warning(
+            "Profiling stopped by its timeout, %s refreshes were not captured",
+            self._remaining,
+        )
+        self._async_stop()
+
+    @callback
+    def _async_stop(self) -> None:
+        """Unregister the profiler and dump what it collected."""
+        if self._unsub_timeout is not None:
+            self._unsub_timeout()
+            self._unsub_timeout = None
+        self.hass.data.pop(DATA_PROFILER, None)
+        # Dumped from a task, so the entity updates of the last refresh are
+        # captured too.
+        self.hass.async_create_background_task(
+            self.async_dump(), f"{DOMAIN} profile dump"
+        )
+
+    async def async_dump(self) -> None:
+        """Stop collecting, write the profile to the config directory and log it."""
+        self._profile.disable()
+        path = self.hass.config.path(f"meteobridge_profile_{int(time.time())}.prof")
+        summary = await self.hass.async_add_executor_job(self._dump, path)
+        _LOGGER.warning(
+            "Profile written to %s, top %s functions:\n%s", path, self._top, summary
+        )
+
+    def _dump(self, path: str) -> str:
+        """Write the pstats file and return the top functions as text."""
+        self._profile.dump_stats(path)
+        stream = io.StringIO()
+        pstats.Stats(self._profile, stream=stream).sort_stats(
+            pstats.SortKey.CUMULATIVE
+        ).print_stats(self._top)
+        return stream.getvalue()
@@ -0,0 +1,218 @@
+"""Local SQLite replica of the Meteobridge archive tables."""
+
+from __future__ import annotations
+
+import asyncio
+from datetime import date, datetime
+from decimal import Decimal
+import logging
+import sqlite3
+from threading import Lock
+from typing import Any
+
+from pymeteobridgesql import (
+    MeteobridgeSQLDatabaseConnectionError,
+    MeteobridgeSQLDataError,
+)
+
+from homeassistant.core import HomeAssistant
+
+from .const import REPLICA_BATCH_SIZE, REPLICA_FILENAME
+from .database import MeteobridgeSQLDatabase
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class ReplicaTable:
+    """Remote archive table and the local table mirroring it."""
+
+    def __init__(self, name: str, source: str, time_column: str) -> None:
+        """Build the incremental query for the table."""
+        self.name = name
+        self.time_column = time_column
+        # Rows at the high-water mark are fetched again, so rows sharing the
+        # last timestamp and the still open current period are kept current.
+        self.sql = (
+            f"SELECT * FROM {source} WHERE `{time_column}` >= %s "
+            f"ORDER BY `{time_column}` LIMIT {REPLICA_BATCH_SIZE}"
+        )
+
+
+REPLICA_TABLES = (
+    ReplicaTable("minute_data", "viewMinuteData", "logdate"),
+    ReplicaTable("daily_data", "viewDailyData", "logdate"),
+    ReplicaTable("monthly_data", "monthly_data", "logdate"),
+)
+
+REPLICA_TABLES_BY_NAME = {table.name: table for table in REPLICA_TABLES}
+
+# Start of the archive when nothing has been replicated yet.
+EPOCH = datetime(1970, 1, 1)
+
+
+def _to_sqlite(value: Any) -> Any:
+    """Convert a MySQL value to one SQLite stores natively."""
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, datetime):
+        return value.isoformat(sep=" ")
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+
+def _to_bound(value: Any) -> Any:
+    """Convert an inclusive start or exclusive end of a range to SQLite.
+
+    Midnight becomes a bare date, which sorts just before the times of that
+    day, so the bound works for tables storing dates as well as times. Only
+    valid for >= and < comparisons, as > a bare date still matches midnight.
+    """
+    value = _to_sqlite(value)
+    if isinstance(value, str) and value.endswith(" 00:00:00"):
+        return value[:10]
+    return value
+
+
+class MeteobridgeSQLReplica:
+    """Keep a local SQLite mirror of a station's archive tables."""
+
+    def __init__(
+        self, hass: HomeAssistant, database: MeteobridgeSQLDatabase, mac: str
+    ) -> None:
+        """Initialize the replica."""
+        self.hass = hass
+        self._database = database
+        self._mac = mac
+        self._connection: sqlite3.Connection | None = None
+        self._columns: dict[str, list[str]] = {}
+        self._lock = Lock()
+        self._syncing = False
+
+    def open(self) -> None:
+        """Open the local database."""
+        self._connection = sqlite3.connect(
+            self.hass.config.path(REPLICA_FILENAME),
+            check_same_thread=False,
+            timeout=30,
+        )
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        for table in REPLICA_TABLES:
+            columns = [
+                row[1]
+                for row in self._connection.execute(f"PRAGMA table_info({table.name})")
+            ]
+            if columns:
+                self._columns[table.name] = columns
+
+    def close(self) -> None:
+        """Close the local database."""
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    async def async_sync(self, *_: Any) -> None:
+        """Copy new archive rows from MySQL in small batches."""
+        if self._syncing:
+            return
+
+        self._syncing = True
+        try:
+            for table in REPLICA_TABLES:
+                try:
+                    while await self._database.async_run(self._sync_batch, table):
+                        await asyncio.sleep(0)
+                except MeteobridgeSQLDatabaseConnectionError as err:
+                    # Retried on the next interval, like every other table.
+                    _LOGGER.debug("Replica sync paused: %s", err)
+                    return
+                except (MeteobridgeSQLDataError, sqlite3.Error) as err:
+                    _LOGGER.debug("Replica sync of %s paused: %s", table.name, err)
+        finally:
+            self._syncing = False
+
+    def covered_until(self, table: str) -> datetime:
+        """Return the time before which a table is fully replicated."""
+        # Rows at the high-water mark may still be incomplete, see ReplicaTable.
+        return self._high_water_mark(REPLICA_TABLES_BY_NAME[table])
+
+    def get_batch(
+        self, table: str, mark: Any, end: datetime, after: bool, limit: int
+    ) -> tuple[list[str], list[tuple[Any, ...]]]:
+        """Return replicated rows from a point in time up to end, oldest first.
+
+        With after set, mark is the time of the last row returned before, as
+        read from the replica, and the batch continues after it.
+        The rows and column names are those of the remote table.
+        """
+        time_column = REPLICA_TABLES_BY_NAME[table].time_column
+        with self._lock:
+            if self._connection is None or table not in self._columns:
+                return [], []
+            cursor = self._connection.execute(
+                f"SELECT * FROM {table} WHERE mac = ? "
+                f"AND `{time_column}` {'>' if after else '>='} ? "
+                f"AND `{time_column}` < ? ORDER BY `{time_column}` LIMIT ?",
+                (self._mac, mark if after else _to_bound(mark), _to_bound(end), limit),
+            )
+            # Leave out the mac column the replica adds in front.
+            columns = [column[0] for column in cursor.description[1:]]
+            return columns, [row[1:] for row in cursor]
+
+    def _sync_batch(self, table: ReplicaTable) -> bool:
+        """Copy one batch of a table and return True if more rows are waiting."""
+        mark = self._high_water_mark(table)
+        columns, rows = self._database.query(table.sql, (mark,))
+        if not rows:
+            return False
+
+        with self._lock:
+            if self._connection is None:
+                return False
+            self._ensure_table(table, columns)
+            placeholders = ", ".join("?" * (len(columns) + 1))
+            names = ", ".join(f"`{column}`" for column in columns)
+            with self._connection:
+                self._connection.executemany(
+                    f"INSERT OR REPLACE INTO {table.name} (mac, {names}) "
+                    f"VALUES ({placeholders})",
+                    [
+                        (self._mac, *(_to_sqlite(value) for value in row))
+                        for row in rows
+                    ],
+                )
+
+        # A full batch that did not move the mark would be fetched forever.
+        return len(rows) == REPLICA_BATCH_SIZE and self._high_water_mark(table) != mark
+
+    def _high_water_mark(self, table: ReplicaTable) -> datetime:
+        """Return the newest replicated time of a table."""
+        with self._lock:
+            if self._connection is None or table.name not in self._columns:
+                return EPOCH
+            (mark,) = self._connection.execute(
+                f"SELECT MAX(`{table.time_column}`) FROM {table.name} WHERE mac = ?",
+                (self._mac,),
+            ).fetchone()
+        return EPOCH if mark is None else datetime.fromisoformat(mark)
+
+    def _ensure_table(self, table: ReplicaTable, columns: list[str]) -> None:
+        """Create the local table, or add columns that appeared remotely."""
+        assert self._connection is not None
+        if (known := self._columns.get(table.name)) is None:
+            definitions = ", ".join(f"`{column}`" for column in columns)
+            self._connection.execute(
+                f"CREATE TABLE IF NOT EXISTS {table.name} (mac TEXT NOT NULL, "
+                f"{definitions}, PRIMARY KEY (mac, `{table.time_column}`))"
+            )
+            self._columns[table.name] = ["mac", *columns]
+            return
+
+        for column in columns:
+            if column not in known:
+                self._connection.execute(
+                    f"ALTER TABLE {table.name} ADD COLUMN `{column}`"
+                )
+                known.append(column)
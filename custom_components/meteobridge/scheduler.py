@@ -0,0 +1,113 @@
+"""Staggered refresh scheduling across all Meteobridge stations."""
+
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass, field
+from datetime import datetime
+from functools import partial
+import random
+from typing import TYPE_CHECKING
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_at
+
+from .const import DOMAIN, HOST_MAX_QUERIES, SCHEDULE_JITTER
+
+if TYPE_CHECKING:
+    from . import MeteobridgeSQLDataUpdateCoordinator
+
+
+@dataclass
+class _Station:
+    """A station and its place in the schedule."""
+
+    coordinator: MeteobridgeSQLDataUpdateCoordinator
+    phase: float = 0.0
+    unsub: CALLBACK_TYPE | None = None
+    refresh: asyncio.Task[None] | None = field(default=None, repr=False)
+
+
+class MeteobridgeSQLScheduler:
+    """Refresh every station at its own evenly spread phase of the interval.
+
+    Coordinators started together, e.g. after a restart, would otherwise all
+    poll the database at the same instant on every interval.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the scheduler."""
+        self.hass = hass
+        self._stations: list[_Station] = []
+        self._host_limits: dict[str, asyncio.Semaphore] = {}
+
+    def host_limit(self, host: str) -> asyncio.Semaphore:
+        """Return the semaphore bounding the concurrent queries to a server.
+
+        It is keyed by the server itself, so every station querying it shares
+        it, whatever host list the station is configured with.
+        """
+        if (limit := self._host_limits.get(host)) is None:
+            limit = self._host_limits[host] = asyncio.Semaphore(HOST_MAX_QUERIES)
+        return limit
+
+    @callback
+    def async_add(
+        self, coordinator: MeteobridgeSQLDataUpdateCoordinator
+    ) -> CALLBACK_TYPE:
+        """Add a station to the schedule, spreading all stations anew."""
+        station = _Station(coordinator)
+        self._stations.append(station)
+        self.async_reschedule()
+
+        @callback
+        def remove_station() -> None:
+            self._async_cancel(station)
+            self._stations.remove(station)
+            self.async_reschedule()
+
+        return remove_station
+
+    @callback
+    def async_reschedule(self) -> None:
+        """Spread the stations evenly over their update intervals."""
+        count = len(self._stations)
+        for index, station in enumerate(self._stations):
+            station.phase = index / count
+            self._async_schedule(station)
+
+    @callback
+    def _async_schedule(self, station: _Station) -> None:
+        """Schedule the next refresh of a station at its phase."""
+        self._async_cancel(station)
+        interval = station.coordinator.refresh_interval.total_seconds()
+        now = self.hass.loop.time()
+        offset = station.phase * interval
+        # Start of the next interval at this phase, counted on the loop clock,
+        # plus jitter of up to a share of the gap to the next station.
+        when = now + ((offset - now) % interval or interval)
+        when += random.uniform(0, interval / len(self._stations) * SCHEDULE_JITTER)
+        station.unsub = async_call_at(
+            self.hass, partial(self._async_refresh, station), when
+        )
+
+    @callback
+    def _async_cancel(self, station: _Station) -> None:
+        """Cancel the scheduled refresh of a station."""
+        if station.unsub is not None:
+            station.unsub()
+            station.unsub = None
+
+    @callback
+    def _async_refresh(self, station: _Station, _now: datetime) -> None:
+        """Refresh a station, unless its previous refresh is still running."""
+        station.unsub = None
+        self._async_schedule(station)
+        coordinator = station.coordinator
+        if coordinator.config_entry.pref_disable_polling or (
+            station.refresh is not None and not station.refresh.done()
+        ):
+            return
+        station.refresh = coordinator.config_entry.async_create_background_task(
+            self.hass, coordinator.async_refresh(), f"{DOMAIN} scheduled refresh"
+        )
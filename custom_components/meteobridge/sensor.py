@@ -28,7 +28,7 @@ from homeassistant.const import (
     UnitOfVolumetricFlux,
     UV_INDEX,
 )
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.device_registry import DeviceEntryType, DeviceInfo
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.typing import StateType
@@ -44,9 +44,11 @@ from .const import (
     ATTR_PRESSURE_TREND,
     ATTR_TEMP_15_MIN,
     CONCENTRATION_GRAMS_PER_CUBIC_METER,
+    CONF_STATISTICS,
     DOMAIN,
     MANUFACTURER,
 )
+from .downsample import MeteobridgeSQLDownsampler
 
 
 @dataclass(frozen=True)
@@ -336,8 +338,33 @@ async def async_setup_entry(
     if coordinator.data.sensor_data == {}:
         return
 
+    statistics = config_entry.data.get(CONF_STATISTICS, [])
+    downsampler: MeteobridgeSQLDownsampler | None = None
+    if statistics:
+        downsampler = MeteobridgeSQLDownsampler(
+            hass,
+            config_entry.data[CONF_MAC],
+            coordinator.data.sensor_data.mb_stationname,
+            (d for d in SENSOR_TYPES if d.key in statistics),
+        )
+        await downsampler.async_restore()
+
+        @callback
+        def async_add_sample() -> None:
+            """Sample the snapshot of a successful refresh."""
+            if coordinator.last_update_success:
+                downsampler.async_add_sample(coordinator.data.sensor_data)
+
+        config_entry.async_on_unload(coordinator.async_add_listener(async_add_sample))
+        config_entry.async_on_unload(downsampler.async_flush)
+
     entities: list[MeteobridgeSQLSensor] = [
-        MeteobridgeSQLSensor(coordinator, description, config_entry)
+        MeteobridgeSQLSensor(
+            coordinator,
+            description,
+            config_entry,
+            downsampler if description.key in statistics else None,
+        )
         for description in SENSOR_TYPES
         if getattr(coordinator.data.sensor_data, description.key) is not None
     ]
@@ -358,12 +385,19 @@ class MeteobridgeSQLSensor(
         coordinator: MeteobridgeSQLDataUpdateCoordinator,
         description: MeteobridgeSQLEntityDescription,
         config: ConfigEntry,
+        downsampler: MeteobridgeSQLDownsampler | None = None,
     ) -> None:
         """Initialize a MeteobridgeSQL sensor."""
         super().__init__(coordinator)
         self.entity_description = description
         self._config = config
         self._coordinator = coordinator
+        self._downsampler = downsampler
+        self._written: tuple[int, bool] | None = None
+        if downsampler is not None:
+            # The state is the 5 minute mean, written once per period, and the
+            # downsampler publishes the long-term statistics itself.
+            self._attr_state_class = None
 
         self._attr_device_info = DeviceInfo(
             identifiers={(DOMAIN, self._config.data[CONF_MAC])},
@@ -388,6 +422,13 @@ class MeteobridgeSQLSensor(
     def native_value(self) -> StateType:
         """Return state of the sensor."""
 
+        if (
+            self._downsampler is not None
+            and (mean := self._downsampler.means.get(self.entity_description.key))
+            is not None
+        ):
+            return round(mean, 2)
+
         return (
             getattr(self.coordinator.data.sensor_data, self.entity_description.key)
             if self.coordinator.data.sensor_data
@@ -420,8 +461,26 @@ class MeteobridgeSQLSensor(
                 ATTR_PRESSURE_TREND: self.coordinator.data.sensor_data.pressuretrend,
             }
 
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write the state when the snapshot or the availability changed."""
+        written = (
+            # A downsampled state only changes when the downsampler closes a period.
+            None
+            if self._downsampler is not None
+            else self.coordinator.data.sensor_data.generation,
+            self.coordinator.last_update_success,
+        )
+        if written != self._written:
+            self._written = written
+            self.async_write_ha_state()
+
     async def async_added_to_hass(self):
         """When entity is added to hass."""
         self.async_on_remove(
-            self.coordinator.async_add_listener(self.async_write_ha_state)
+            self.coordinator.async_add_listener(self._handle_coordinator_update)
         )
+        if self._downsampler is not None:
+            self.async_on_remove(
+                self._downsampler.async_add_listener(self.async_write_ha_state)
+            )
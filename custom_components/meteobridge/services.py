@@ -0,0 +1,127 @@
+"""Services for the MeteobridgeSQL integration."""
+
+from __future__ import annotations
+
+from datetime import datetime
+import sqlite3
+
+from pymeteobridgesql import (
+    MeteobridgeSQLDatabaseConnectionError,
+    MeteobridgeSQLDataError,
+)
+import voluptuous as vol
+
+from homeassistant.const import CONF_MAC
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+    callback,
+)
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import config_validation as cv
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    ATTR_CYCLES,
+    ATTR_END,
+    ATTR_START,
+    ATTR_STATION,
+    ATTR_TABLE,
+    ATTR_TOP,
+    DEFAULT_PROFILE_CYCLES,
+    DEFAULT_PROFILE_TOP,
+    DOMAIN,
+    PROFILE_TIMEOUT_FACTOR,
+    SERVICE_EXPORT,
+    SERVICE_PROFILE,
+)
+from .export import EXPORT_TABLES, MeteobridgeSQLExport
+from .profiler import RefreshProfiler
+
+PROFILE_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_CYCLES, default=DEFAULT_PROFILE_CYCLES): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=100)
+        ),
+        vol.Optional(ATTR_TOP, default=DEFAULT_PROFILE_TOP): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=200)
+        ),
+    }
+)
+
+EXPORT_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_TABLE, default="minute_data"): vol.In(EXPORT_TABLES),
+        vol.Required(ATTR_START): cv.datetime,
+        vol.Optional(ATTR_END): cv.datetime,
+        vol.Optional(ATTR_STATION): cv.string,
+    }
+)
+
+
+def _station_time(value: datetime) -> datetime:
+    """Return a time as the naive local time the archive tables use."""
+    if value.tzinfo is None:
+        return value
+    return dt_util.as_local(value).replace(tzinfo=None)
+
+
+@callback
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the MeteobridgeSQL services."""
+
+    async def async_profile(call: ServiceCall) -> None:
+        """Profile the next refresh cycles of all stations."""
+        if not (coordinators := list(hass.data.get(DOMAIN, {}).values())):
+            raise HomeAssistantError("No Meteobridge station is loaded")
+        cycles = call.data[ATTR_CYCLES]
+        interval = max(c.refresh_interval for c in coordinators).total_seconds()
+        RefreshProfiler(
+            hass, cycles * len(coordinators), call.data[ATTR_TOP]
+        ).async_start(cycles * interval * PROFILE_TIMEOUT_FACTOR)
+
+    async def async_export(call: ServiceCall) -> ServiceResponse:
+        """Export an archive table of every, or the selected, station."""
+        table = EXPORT_TABLES[call.data[ATTR_TABLE]]
+        start = _station_time(call.data[ATTR_START])
+        end = _station_time(call.data.get(ATTR_END) or dt_util.now())
+        exports = []
+        for coordinator in hass.data.get(DOMAIN, {}).values():
+            mac = coordinator.config_entry.data[CONF_MAC]
+            if call.data.get(ATTR_STATION, mac).lower() != mac.lower():
+                continue
+            export = MeteobridgeSQLExport(
+                hass,
+                coordinator.weather.database,
+                coordinator.replica,
+                mac,
+                table,
+                start,
+                end,
+            )
+            try:
+                await export.async_run()
+            except (
+                MeteobridgeSQLDatabaseConnectionError,
+                MeteobridgeSQLDataError,
+                sqlite3.Error,
+            ) as err:
+                raise HomeAssistantError(f"Export of {mac} failed: {err}") from err
+            result = {"station": mac, "file": export.path, "rows": export.rows}
+            if export.missing_from is not None:
+                result["missing_from"] = export.missing_from.isoformat()
+            exports.append(result)
+        return {"exports": exports}
+
+    hass.services.async_register(
+        DOMAIN, SERVICE_PROFILE, async_profile, schema=PROFILE_SCHEMA
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_EXPORT,
+        async_export,
+        schema=EXPORT_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
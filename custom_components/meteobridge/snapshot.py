@@ -0,0 +1,44 @@
+"""Compact realtime snapshot of a Meteobridge station."""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+from dataclasses import fields
+from typing import Any
+
+from pymeteobridgesql import RealtimeData
+
+# Column order of a realtime_data row.
+REALTIME_FIELDS = tuple(field.name for field in fields(RealtimeData))
+
+
+class RealtimeSnapshot:
+    """Realtime values of a station, updated in place on every refresh.
+
+    The derived values (feels like temperature, visibility, ...) are the
+    properties of the library's RealtimeData, so the snapshot reads the same.
+    """
+
+    __slots__ = (*REALTIME_FIELDS, "generation")
+
+    def __init__(self) -> None:
+        """Initialize an empty snapshot."""
+        for name in REALTIME_FIELDS:
+            setattr(self, name, None)
+        self.generation = 0
+
+    def update(self, row: Sequence[Any]) -> bool:
+        """Copy a realtime row into the snapshot and return True if it changed."""
+        changed = False
+        for name, value in zip(REALTIME_FIELDS, row, strict=True):
+            if getattr(self, name) != value:
+                setattr(self, name, value)
+                changed = True
+        if changed:
+            self.generation += 1
+        return changed
+
+
+for _name, _value in vars(RealtimeData).items():
+    if isinstance(_value, property) or _name == "to_dict":
+        setattr(RealtimeSnapshot, _name, _value)
@@ -5,7 +5,7 @@ from __future__ import annotations
 import logging
 
 from types import MappingProxyType
-from typing import Any
+from typing import Any, Literal
 
 from homeassistant.components.weather.const import (
     DOMAIN as WEATHER_DOMAIN,
@@ -113,6 +113,9 @@ class MeteobridgeSQLWeather(
         self._is_metric = is_metric
         self._hourly = hourly
         self._attr_entity_registry_enabled_default = not hourly
+        self._written: tuple[int, bool] | None = None
+        self._daily_generation = 0
+        self._hourly_generation = 0
         self._attr_device_info = DeviceInfo(
             name="Weather Entity",
             entry_type=DeviceEntryType.SERVICE,
@@ -122,6 +125,30 @@ class MeteobridgeSQLWeather(
             configuration_url="https://www.visualcrossing.com/weather-api",
         )
 
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write the state and push forecasts to subscribers when they changed."""
+        data = self.coordinator.data
+        written = (data.sensor_data.generation, self.coordinator.last_update_success)
+        if written != self._written:
+            self._written = written
+            self.async_write_ha_state()
+
+        changed: list[Literal["daily", "hourly"]] = []
+        if data.daily_generation != self._daily_generation:
+            self._daily_generation = data.daily_generation
+            changed.append("daily")
+        if data.hourly_generation != self._hourly_generation:
+            self._hourly_generation = data.hourly_generation
+            changed.append("hourly")
+
+        if changed:
+            self.coordinator.config_entry.async_create_background_task(
+                self.hass,
+                self.async_update_listeners(changed),
+                f"{DOMAIN} forecast listener update",
+            )
+
     @property
     def condition(self) -> str | None:
         """Return the current condition."""
@@ -204,7 +231,9 @@ class MeteobridgeSQLWeather(
                 native_temperature = item.temperature
                 native_templow = item.temp_low
                 native_precipitation = item.precipitation
-                wind_bearing = int(item.wind_bearing)
+                wind_bearing = (
+                    int(item.wind_bearing) if item.wind_bearing is not None else None
+                )
                 native_wind_speed = item.wind_speed
                 native_wind_gust_speed = item.wind_gust
 
@@ -0,0 +1,29 @@
+"""Run the MeteobridgeSQL soak harness."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import sys
+
+from homeassistant import runner
+
+from harness import async_run, get_arguments
+
+
+def main() -> int:
+    """Run the soak test and print the final report."""
+    args = get_arguments()
+    asyncio.set_event_loop_policy(runner.HassEventLoopPolicy(False))
+    report = asyncio.run(async_run(args))
+
+    output = json.dumps(report, indent=2)
+    sys.stdout.write(output + "\n")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(output + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
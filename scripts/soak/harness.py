@@ -0,0 +1,340 @@
+"""Soak harness running MeteobridgeSQL config entries against the stand-in."""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+from dataclasses import dataclass, field
+import importlib
+import json
+import logging
+import os
+from pathlib import Path
+import resource
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from typing import Any
+
+from homeassistant import bootstrap, config_entries, const
+from homeassistant.const import (
+    CONF_HOST,
+    CONF_MAC,
+    CONF_PASSWORD,
+    CONF_PORT,
+    CONF_USERNAME,
+)
+from homeassistant.core import Event, HomeAssistant, callback
+from homeassistant.runner import RuntimeConfig
+
+from server import StandInServer
+
+_LOGGER = logging.getLogger(__name__)
+
+DOMAIN = "meteobridge"
+INTEGRATION = Path(__file__).parents[2] / "custom_components" / DOMAIN
+LAG_PROBE_INTERVAL = 0.05
+SAMPLE_INTERVAL = 1.0
+
+CONFIGURATION = """\
+homeassistant:
+  name: Meteobridge soak
+  unit_system: metric
+  time_zone: UTC
+logger:
+  default: warning
+recorder:
+"""
+
+
+def _percentile(values: list[float], percent: int) -> float | None:
+    """Return a percentile of a list of samples."""
+    if not values:
+        return None
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method="inclusive")[percent - 1]
+
+
+def _rss() -> int:
+    """Return the resident set size of the process in bytes."""
+    try:
+        with open("/proc/self/statm", encoding="ascii") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+@dataclass
+class SoakMetrics:
+    """Samples collected during a soak run."""
+
+    started: float = field(default_factory=time.monotonic)
+    loop_lag: list[float] = field(default_factory=list)
+    executor_depth: list[int] = field(default_factory=list)
+    db_executor_depth: list[int] = field(default_factory=list)
+    db_jobs: int = 0
+    db_queue_time: float = 0.0
+    db_queue_time_max: float = 0.0
+    refreshes: list[float] = field(default_factory=list)
+    refresh_failures: int = 0
+    state_writes: int = 0
+    rss_start: int = 0
+    rss_peak: int = 0
+    rss_end: int = 0
+
+    def summary(self, server: StandInServer) -> dict[str, Any]:
+        """Return the metrics as a report."""
+        minutes = max(time.monotonic() - self.started, 1) / 60
+        return {
+            "minutes": round(minutes, 2),
+            "loop_lag_ms": {
+                "p50": _ms(_percentile(self.loop_lag, 50)),
+                "p99": _ms(_percentile(self.loop_lag, 99)),
+                "max": _ms(max(self.loop_lag, default=None)),
+            },
+            "executor_queue_depth": {
+                "p50": _percentile(self.executor_depth, 50),
+                "p99": _percentile(self.executor_depth, 99),
+                "max": max(self.executor_depth, default=None),
+            },
+            "db_executor": {
+                "queue_depth_p50": _percentile(self.db_executor_depth, 50),
+                "queue_depth_p99": _percentile(self.db_executor_depth, 99),
+                "queue_depth_max": max(self.db_executor_depth, default=None),
+                "jobs": self.db_jobs,
+                "queue_wait_mean_ms": _ms(
+                    self.db_queue_time / self.db_jobs if self.db_jobs else None
+                ),
+                "queue_wait_max_ms": _ms(self.db_queue_time_max),
+            },
+            "refresh_ms": {
+                "count": len(self.refreshes),
+                "failures": self.refresh_failures,
+                "p50": _ms(_percentile(self.refreshes, 50)),
+                "p99": _ms(_percentile(self.refreshes, 99)),
+            },
+            "memory_mb": {
+                "start": round(self.rss_start / 2**20, 1),
+                "end": round(self.rss_end / 2**20, 1),
+                "peak": round(self.rss_peak / 2**20, 1),
+                "growth": round((self.rss_end - self.rss_start) / 2**20, 1),
+            },
+            "state_writes_per_minute": round(self.state_writes / minutes, 1),
+            "server": vars(server.stats).copy(),
+        }
+
+
+def _ms(value: float | None) -> float | None:
+    """Convert seconds to rounded milliseconds."""
+    return None if value is None else round(value * 1000, 2)
+
+
+def _setup_config_dir(path: Path) -> None:
+    """Create a configuration directory with the integration linked in."""
+    (path / "custom_components").mkdir(parents=True, exist_ok=True)
+    link = path / "custom_components" / DOMAIN
+    if not link.exists():
+        link.symlink_to(INTEGRATION, target_is_directory=True)
+    config = path / "configuration.yaml"
+    if not config.exists():
+        config.write_text(CONFIGURATION, encoding="utf-8")
+
+
+def _instrument_refreshes(metrics: SoakMetrics) -> None:
+    """Time every coordinator refresh of the integration."""
+    module = importlib.import_module(f"custom_components.{DOMAIN}")
+    coordinator = module.MeteobridgeSQLDataUpdateCoordinator
+    original = coordinator._async_update_data
+
+    async def _timed_update_data(self: Any) -> Any:
+        start = time.perf_counter()
+        try:
+            return await original(self)
+        except Exception:
+            metrics.refresh_failures += 1
+            raise
+        finally:
+            metrics.refreshes.append(time.perf_counter() - start)
+
+    coordinator._async_update_data = _timed_update_data
+
+
+async def _probe_loop_lag(metrics: SoakMetrics) -> None:
+    """Measure how late the event loop wakes up a sleeping task."""
+    loop = asyncio.get_running_loop()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(LAG_PROBE_INTERVAL)
+        metrics.loop_lag.append(max(0.0, loop.time() - start - LAG_PROBE_INTERVAL))
+
+
+async def _sample(hass: HomeAssistant, metrics: SoakMetrics) -> None:
+    """Sample the shared and the database executor queues, and memory."""
+    executor = hass.loop._default_executor
+    while True:
+        if executor is not None:
+            metrics.executor_depth.append(executor._work_queue.qsize())
+        databases = [
+            coordinator.weather.database.executor
+            for coordinator in hass.data.get(DOMAIN, {}).values()
+        ]
+        metrics.db_executor_depth.append(sum(db.pending for db in databases))
+        metrics.db_jobs = sum(db.jobs for db in databases)
+        metrics.db_queue_time = sum(db.queue_time for db in databases)
+        metrics.db_queue_time_max = max(
+            (db.max_queue_time for db in databases), default=0.0
+        )
+        metrics.rss_peak = max(metrics.rss_peak, _rss())
+        await asyncio.sleep(SAMPLE_INTERVAL)
+
+
+def _count_state_writes(hass: HomeAssistant, metrics: SoakMetrics) -> None:
+    """Count every state write, including writes that did not change the state."""
+
+    @callback
+    def _filter(event_data: Any) -> bool:
+        return True
+
+    @callback
+    def _count(event: Event) -> None:
+        metrics.state_writes += 1
+
+    events = [const.EVENT_STATE_CHANGED]
+    if reported := getattr(const, "EVENT_STATE_REPORTED", None):
+        events.append(reported)
+    for event_type in events:
+        hass.bus.async_listen(event_type, _count, event_filter=_filter)
+
+
+async def _add_entries(
+    hass: HomeAssistant, args: argparse.Namespace, port: int
+) -> None:
+    """Create the config entries through the config flow."""
+    for index in range(args.entries):
+        result = await hass.config_entries.flow.async_init(
+            DOMAIN,
+            context={"source": config_entries.SOURCE_USER},
+            data={
+                CONF_MAC: f"02:00:00:00:{index // 256:02X}:{index % 256:02X}",
+                CONF_HOST: "127.0.0.1",
+                CONF_PORT: port,
+                CONF_USERNAME: "soak",
+                CONF_PASSWORD: "soak",
+                "database": "meteobridge",
+                "update_interval": args.interval,
+                "compression": args.compress,
+                "replica": args.replica,
+                "statistics": [],
+                "daily_from_hourly": args.daily_from_hourly,
+            },
+        )
+        if result["type"] != "create_entry":
+            _LOGGER.error("Entry %s was not created: %s", index, result)
+    await hass.async_block_till_done()
+
+
+async def async_run(args: argparse.Namespace) -> dict[str, Any]:
+    """Run a soak test and return the final report."""
+    server = StandInServer(
+        port=args.port,
+        latency=args.latency / 1000,
+        jitter=args.jitter / 1000,
+        failure_rate=args.failure_rate,
+        forecast_period=args.forecast_period,
+    )
+    server.start()
+
+    config_dir = Path(args.config_dir or tempfile.mkdtemp(prefix="meteobridge-soak-"))
+    _setup_config_dir(config_dir)
+    hass = await bootstrap.async_setup_hass(
+        RuntimeConfig(config_dir=str(config_dir), skip_pip=True)
+    )
+    if hass is None:
+        server.stop()
+        raise RuntimeError("Home Assistant failed to start")
+    await hass.async_start()
+
+    metrics = SoakMetrics()
+    _instrument_refreshes(metrics)
+    _count_state_writes(hass, metrics)
+    await _add_entries(hass, args, server.port)
+
+    metrics.started = time.monotonic()
+    metrics.rss_start = metrics.rss_peak = _rss()
+    tasks = [
+        hass.async_create_background_task(_probe_loop_lag(metrics), "soak lag"),
+        hass.async_create_background_task(_sample(hass, metrics), "soak sample"),
+    ]
+    try:
+        deadline = time.monotonic() + args.duration
+        while (remaining := deadline - time.monotonic()) > 0:
+            await asyncio.sleep(min(args.report_interval, remaining))
+            metrics.rss_end = _rss()
+            sys.stdout.write(json.dumps(metrics.summary(server)) + "\n")
+            sys.stdout.flush()
+    finally:
+        for task in tasks:
+            task.cancel()
+        metrics.rss_end = _rss()
+        report = metrics.summary(server)
+        await hass.async_stop()
+        server.stop()
+        if not args.config_dir:
+            shutil.rmtree(config_dir, ignore_errors=True)
+
+    return report
+
+
+def get_arguments() -> argparse.Namespace:
+    """Parse the command line."""
+    parser = argparse.ArgumentParser(
+        description="Soak test MeteobridgeSQL entries against a local MySQL stand-in."
+    )
+    parser.add_argument("--entries", type=int, default=10, help="config entries")
+    parser.add_argument(
+        "--interval",
+        type=int,
+        default=15,
+        choices=[15, 30, 45, 60],
+        help="update interval of each entry in seconds",
+    )
+    parser.add_argument(
+        "--duration", type=float, default=3600, help="run time in seconds"
+    )
+    parser.add_argument(
+        "--report-interval", type=float, default=60, help="seconds between reports"
+    )
+    parser.add_argument(
+        "--latency", type=float, default=0, help="added latency per command (ms)"
+    )
+    parser.add_argument(
+        "--jitter", type=float, default=0, help="random extra latency (ms)"
+    )
+    parser.add_argument(
+        "--failure-rate",
+        type=float,
+        default=0,
+        help="share of commands answered with an error or a dropped connection",
+    )
+    parser.add_argument(
+        "--forecast-period",
+        type=float,
+        default=600,
+        help="seconds between forecast content changes",
+    )
+    parser.add_argument("--compress", action="store_true", help="enable compression")
+    parser.add_argument("--replica", action="store_true", help="enable the replica")
+    parser.add_argument(
+        "--daily-from-hourly",
+        action="store_true",
+        help="derive the daily forecast from the hourly forecast",
+    )
+    parser.add_argument("--port", type=int, default=0, help="stand-in port")
+    parser.add_argument(
+        "--config-dir", help="keep the Home Assistant configuration in this directory"
+    )
+    parser.add_argument("--output", help="write the final report to this file")
+    return parser.parse_args()
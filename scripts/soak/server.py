@@ -0,0 +1,759 @@
+"""MySQL protocol stand-in serving Meteobridge shaped tables.
+
+Only the parts of the protocol the integration and the connector use are
+implemented: the handshake with caching_sha2_password fast auth, text
+queries, prepared statements with the binary protocol, ping and the
+compressed protocol. Rows are generated from the pymeteobridgesql
+dataclasses, so the column layout follows the installed library.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass, field, fields
+import datetime as dt
+import logging
+import os
+import random
+import re
+import struct
+from threading import Thread
+import time
+from typing import Any
+import zlib
+
+from pymeteobridgesql import (
+    ForecastDaily,
+    ForecastHourly,
+    MinuteData,
+    RealtimeData,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+# Capability flags.
+CLIENT_LONG_PASSWORD = 0x1
+CLIENT_FOUND_ROWS = 0x2
+CLIENT_LONG_FLAG = 0x4
+CLIENT_CONNECT_WITH_DB = 0x8
+CLIENT_COMPRESS = 0x20
+CLIENT_PROTOCOL_41 = 0x200
+CLIENT_TRANSACTIONS = 0x2000
+CLIENT_SECURE_CONNECTION = 0x8000
+CLIENT_MULTI_RESULTS = 0x20000
+CLIENT_PLUGIN_AUTH = 0x80000
+CLIENT_PLUGIN_AUTH_LENENC = 0x200000
+
+SERVER_CAPABILITIES = (
+    CLIENT_LONG_PASSWORD
+    | CLIENT_FOUND_ROWS
+    | CLIENT_LONG_FLAG
+    | CLIENT_CONNECT_WITH_DB
+    | CLIENT_COMPRESS
+    | CLIENT_PROTOCOL_41
+    | CLIENT_TRANSACTIONS
+    | CLIENT_SECURE_CONNECTION
+    | CLIENT_MULTI_RESULTS
+    | CLIENT_PLUGIN_AUTH
+    | CLIENT_PLUGIN_AUTH_LENENC
+)
+
+# Commands.
+COM_QUIT = 0x01
+COM_INIT_DB = 0x02
+COM_QUERY = 0x03
+COM_PING = 0x0E
+COM_STMT_PREPARE = 0x16
+COM_STMT_EXECUTE = 0x17
+COM_STMT_CLOSE = 0x19
+COM_STMT_RESET = 0x1A
+COM_RESET_CONNECTION = 0x1F
+
+# Column types.
+TYPE_TINY = 0x01
+TYPE_SHORT = 0x02
+TYPE_LONG = 0x03
+TYPE_FLOAT = 0x04
+TYPE_DOUBLE = 0x05
+TYPE_NULL = 0x06
+TYPE_TIMESTAMP = 0x07
+TYPE_LONGLONG = 0x08
+TYPE_DATE = 0x0A
+TYPE_DATETIME = 0x0C
+TYPE_VARCHAR = 0x0F
+TYPE_VAR_STRING = 0xFD
+TYPE_STRING = 0xFE
+
+# Display length and decimals announced per column type.
+COLUMN_SIZES = {
+    TYPE_DOUBLE: (22, 31),
+    TYPE_LONGLONG: (20, 0),
+    TYPE_DATETIME: (19, 0),
+    TYPE_DATE: (10, 0),
+}
+
+SERVER_STATUS_AUTOCOMMIT = 0x2
+MIN_COMPRESS_LENGTH = 50
+
+ICONS = ("clear-day", "partly-cloudy-day", "cloudy", "rain", "wind", "fog")
+RE_SELECT = re.compile(r"select\s+(.*?)\s+from\s+`?(\w+)`?", re.I | re.S)
+RE_LIMIT = re.compile(r"limit\s+(\d+)", re.I)
+RE_LITERAL = re.compile(r"'([^']*)'")
+RE_AFTER = re.compile(r"`\s*>\s*(?:%s|\?)")
+
+
+def _lenenc_int(value: int) -> bytes:
+    """Encode a length encoded integer."""
+    if value < 0xFB:
+        return bytes((value,))
+    if value < 1 << 16:
+        return b"\xfc" + struct.pack("<H", value)
+    if value < 1 << 24:
+        return b"\xfd" + struct.pack("<I", value)[:3]
+    return b"\xfe" + struct.pack("<Q", value)
+
+
+def _lenenc_str(value: bytes) -> bytes:
+    """Encode a length encoded string."""
+    return _lenenc_int(len(value)) + value
+
+
+def _read_lenenc_int(data: bytes, pos: int) -> tuple[int, int]:
+    """Decode a length encoded integer, returning it and the new position."""
+    first = data[pos]
+    if first < 0xFB:
+        return first, pos + 1
+    if first == 0xFC:
+        return struct.unpack_from("<H", data, pos + 1)[0], pos + 3
+    if first == 0xFD:
+        return int.from_bytes(data[pos + 1 : pos + 4], "little"), pos + 4
+    return struct.unpack_from("<Q", data, pos + 1)[0], pos + 9
+
+
+def _ok(status: int = SERVER_STATUS_AUTOCOMMIT) -> bytes:
+    """Build an OK packet."""
+    return b"\x00\x00\x00" + struct.pack("<HH", status, 0)
+
+
+def _eof() -> bytes:
+    """Build an EOF packet."""
+    return b"\xfe" + struct.pack("<HH", 0, SERVER_STATUS_AUTOCOMMIT)
+
+
+def _err(code: int, state: str, message: str) -> bytes:
+    """Build an ERR packet."""
+    return b"\xff" + struct.pack("<H", code) + b"#" + state.encode() + message.encode()
+
+
+@dataclass
+class Column:
+    """Column of a served table."""
+
+    name: str
+    type: int
+    python: str
+
+
+def _columns(cls: type) -> list[Column]:
+    """Derive the column layout from a pymeteobridgesql dataclass."""
+    columns = []
+    for item in fields(cls):
+        annotation = str(item.type)
+        if "datetime" in annotation:
+            columns.append(Column(item.name, TYPE_DATETIME, "datetime"))
+        elif "date" in annotation:
+            columns.append(Column(item.name, TYPE_DATE, "date"))
+        elif "float" in annotation:
+            columns.append(Column(item.name, TYPE_DOUBLE, "float"))
+        elif "int" in annotation:
+            columns.append(Column(item.name, TYPE_LONGLONG, "int"))
+        else:
+            columns.append(Column(item.name, TYPE_VAR_STRING, "str"))
+    return columns
+
+
+def _column_definition(table: str, column: Column) -> bytes:
+    """Build a column definition packet."""
+    charset = 33 if column.type == TYPE_VAR_STRING else 63
+    length, decimals = COLUMN_SIZES.get(column.type, (1020, 0))
+    return (
+        _lenenc_str(b"def")
+        + _lenenc_str(b"meteobridge")
+        + _lenenc_str(table.encode())
+        + _lenenc_str(table.encode())
+        + _lenenc_str(column.name.encode())
+        + _lenenc_str(column.name.encode())
+        + b"\x0c"
+        + struct.pack("<HIBHB", charset, length, column.type, 0, decimals)
+        + b"\x00\x00"
+    )
+
+
+def _text_value(column: Column, value: Any) -> bytes:
+    """Encode a value for a text protocol row."""
+    if value is None:
+        return b"\xfb"
+    if column.python == "datetime":
+        return _lenenc_str(value.strftime("%Y-%m-%d %H:%M:%S").encode())
+    return _lenenc_str(str(value).encode())
+
+
+def _binary_value(column: Column, value: Any) -> bytes:
+    """Encode a value for a binary protocol row."""
+    if column.type == TYPE_DOUBLE:
+        return struct.pack("<d", value)
+    if column.type == TYPE_LONGLONG:
+        return struct.pack("<q", value)
+    if column.type == TYPE_DATETIME:
+        return b"\x07" + struct.pack(
+            "<HBBBBB",
+            value.year,
+            value.month,
+            value.day,
+            value.hour,
+            value.minute,
+            value.second,
+        )
+    if column.type == TYPE_DATE:
+        return b"\x04" + struct.pack("<HBB", value.year, value.month, value.day)
+    return _lenenc_str(str(value).encode())
+
+
+def _binary_row(columns: list[Column], row: list[Any]) -> bytes:
+    """Build a binary protocol row packet."""
+    bitmap = bytearray((len(columns) + 9) // 8)
+    values = bytearray()
+    for index, (column, value) in enumerate(zip(columns, row, strict=True)):
+        if value is None:
+            bit = index + 2
+            bitmap[bit // 8] |= 1 << (bit % 8)
+        else:
+            values += _binary_value(column, value)
+    return b"\x00" + bytes(bitmap) + bytes(values)
+
+
+def _read_binary_param(param_type: int, data: bytes, pos: int) -> tuple[Any, int]:
+    """Decode one prepared statement parameter."""
+    if param_type in (TYPE_VAR_STRING, TYPE_STRING, TYPE_VARCHAR):
+        length, pos = _read_lenenc_int(data, pos)
+        return data[pos : pos + length].decode(), pos + length
+    if param_type in (TYPE_DATETIME, TYPE_TIMESTAMP, TYPE_DATE):
+        length = data[pos]
+        raw = data[pos + 1 : pos + 1 + length]
+        parts = [1970, 1, 1, 0, 0, 0]
+        if length >= 4:
+            parts[:3] = struct.unpack_from("<HBB", raw)
+        if length >= 7:
+            parts[3:] = struct.unpack_from("<BBB", raw, 4)
+        return dt.datetime(*parts), pos + 1 + length
+    sizes = {
+        TYPE_TINY: "<b",
+        TYPE_SHORT: "<h",
+        TYPE_LONG: "<i",
+        TYPE_LONGLONG: "<q",
+        TYPE_FLOAT: "<f",
+        TYPE_DOUBLE: "<d",
+    }
+    fmt = sizes.get(param_type & 0xFF, "<q")
+    return struct.unpack_from(fmt, data, pos)[0], pos + struct.calcsize(fmt)
+
+
+@dataclass
+class ServerStats:
+    """Counters of the stand-in server."""
+
+    connections: int = 0
+    commands: int = 0
+    queries: int = 0
+    executes: int = 0
+    prepares: int = 0
+    bytes_in: int = 0
+    bytes_out: int = 0
+    injected_errors: int = 0
+    injected_drops: int = 0
+    # Commands being served at once, a measure of how bursty the load is.
+    in_flight: int = 0
+    peak_in_flight: int = 0
+
+
+@dataclass
+class Station:
+    """Realtime state of one simulated station."""
+
+    mac: str
+    values: dict[str, Any] = field(default_factory=dict)
+
+
+class MeteobridgeData:
+    """Generate Meteobridge shaped rows."""
+
+    def __init__(self, forecast_period: float, archive_days: float) -> None:
+        """Initialize the generators."""
+        self.realtime_columns = _columns(RealtimeData)
+        self.hourly_columns = _columns(ForecastHourly)
+        self.daily_columns = _columns(ForecastDaily)
+        self.minute_columns = _columns(MinuteData)
+        self._forecast_period = forecast_period
+        self._archive_start = dt.datetime.now().replace(
+            second=0, microsecond=0
+        ) - dt.timedelta(days=archive_days)
+        self._stations: dict[str, Station] = {}
+
+    def table(
+        self, name: str, params: list[Any], sql: str
+    ) -> tuple[list[Column], list[list[Any]]]:
+        """Return the columns and rows a query on a table produces."""
+        name = name.lower()
+        if name == "realtime_data":
+            mac = params[0] if params else next(iter(RE_LITERAL.findall(sql)), "")
+            return self.realtime_columns, [self._realtime(str(mac))]
+        if name == "forecast_hourly":
+            return self.hourly_columns, self._forecast(True)
+        if name == "forecast_daily":
+            return self.daily_columns, self._forecast(False)
+        if name in ("viewminutedata", "minute_data"):
+            limit = RE_LIMIT.search(sql)
+            since = params[0] if params else self._archive_start
+            if RE_AFTER.search(sql) and isinstance(since, dt.datetime):
+                since += dt.timedelta(minutes=1)
+            return self.minute_columns, self._archive(
+                since, int(limit.group(1)) if limit else 1000
+            )
+        return [], []
+
+    def _realtime(self, mac: str) -> list[Any]:
+        """Return the next realtime row of a station, drifting every call."""
+        station = self._stations.setdefault(mac, Station(mac))
+        row = []
+        for column in self.realtime_columns:
+            if column.name == "ID":
+                value: Any = mac
+            elif column.name == "mb_stationname":
+                value = f"Soak {mac[-5:]}"
+            elif column.name == "icon":
+                value = random.choice(ICONS)
+            elif column.python == "float":
+                value = station.values.get(column.name, random.uniform(0, 30))
+                value = round(value + random.uniform(-0.2, 0.2), 2)
+            elif column.python == "int":
+                value = station.values.get(column.name, random.randint(0, 100))
+                value = max(0, value + random.randint(-1, 1))
+            elif column.python == "datetime":
+                value = dt.datetime.now().replace(microsecond=0)
+            else:
+                value = column.name
+            station.values[column.name] = value
+            row.append(value)
+        return row
+
+    def _forecast(self, hourly: bool) -> list[list[Any]]:
+        """Return forecast rows, changing content once per forecast period."""
+        issued = int(time.time() // self._forecast_period)
+        rng = random.Random(issued * 2 + hourly)
+        now = dt.datetime.now().replace(minute=0, second=0, microsecond=0)
+        columns = self.hourly_columns if hourly else self.daily_columns
+        rows = []
+        for index in range(48 if hourly else 15):
+            when = (
+                now + dt.timedelta(hours=index + 1)
+                if hourly
+                else now.replace(hour=0) + dt.timedelta(days=index)
+            )
+            row = []
+            for column in columns:
+                if column.name in ("hour_num", "day_num"):
+                    value: Any = index
+                elif column.name == "datetime":
+                    value = when
+                elif column.name == "icon":
+                    value = rng.choice(ICONS)
+                elif column.python == "float":
+                    value = round(rng.uniform(0, 25), 1)
+                elif column.python == "int":
+                    value = rng.randint(0, 100)
+                else:
+                    value = column.name
+                row.append(value)
+            rows.append(row)
+        return rows
+
+    def _archive(self, since: Any, limit: int) -> list[list[Any]]:
+        """Return minute archive rows from a point in time up to now."""
+        start = max(
+            self._archive_start,
+            since if isinstance(since, dt.datetime) else self._archive_start,
+        )
+        start = start.replace(second=0, microsecond=0)
+        now = dt.datetime.now()
+        rows = []
+        when = start
+        while when <= now and len(rows) < limit:
+            rng = random.Random(when.timestamp())
+            row = []
+            for column in self.minute_columns:
+                if column.python == "datetime":
+                    value: Any = when
+                elif column.python == "float":
+                    value = round(rng.uniform(0, 25), 1)
+                elif column.python == "int":
+                    value = rng.randint(0, 100)
+                else:
+                    value = column.name
+                row.append(value)
+            rows.append(row)
+            when += dt.timedelta(minutes=1)
+        return rows
+
+
+@dataclass
+class Statement:
+    """Prepared statement of a connection."""
+
+    sql: str
+    params: int
+    columns: list[Column]
+    table: str
+    types: list[int] = field(default_factory=list)
+
+
+class Connection:
+    """One client connection to the stand-in."""
+
+    def __init__(
+        self,
+        server: StandInServer,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+    ) -> None:
+        """Initialize the connection."""
+        self._server = server
+        self._reader = reader
+        self._writer = writer
+        self._compressed = False
+        self._seq = 0
+        self._compressed_seq = 0
+        self._inbox: list[tuple[int, bytes]] = []
+        self._statements: dict[int, Statement] = {}
+        self._next_statement = 1
+
+    async def run(self) -> None:
+        """Serve the connection until the client quits."""
+        stats = self._server.stats
+        stats.connections += 1
+        try:
+            await self._handshake()
+            while True:
+                seq, payload = await self._read_packet()
+                self._seq = seq + 1
+                stats.commands += 1
+                if not payload or payload[0] == COM_QUIT:
+                    return
+                stats.in_flight += 1
+                stats.peak_in_flight = max(stats.peak_in_flight, stats.in_flight)
+                try:
+                    if payload[0] != COM_STMT_CLOSE and (fault := await self._inject()):
+                        if fault == "drop":
+                            return
+                        self._send([_err(1205, "HY000", "Lock wait timeout exceeded")])
+                        await self._writer.drain()
+                        continue
+                    await self._command(payload)
+                finally:
+                    stats.in_flight -= 1
+        except (asyncio.IncompleteReadError, ConnectionError):
+            return
+        finally:
+            self._writer.close()
+
+    async def _inject(self) -> str | None:
+        """Apply latency and return the failure to inject, if any."""
+        server = self._server
+        if server.latency or server.jitter:
+            await asyncio.sleep(server.latency + random.uniform(0, server.jitter))
+        if not server.failure_rate or random.random() >= server.failure_rate:
+            return None
+        if random.random() < 0.5:
+            server.stats.injected_drops += 1
+            return "drop"
+        server.stats.injected_errors += 1
+        return "error"
+
+    async def _handshake(self) -> None:
+        """Run the connection phase, accepting any credentials."""
+        scramble = os.urandom(20)
+        greeting = (
+            b"\x0a8.0.36-meteobridge-standin\x00"
+            + struct.pack("<I", self._server.stats.connections)
+            + scramble[:8]
+            + b"\x00"
+            + struct.pack("<H", SERVER_CAPABILITIES & 0xFFFF)
+            + bytes((33,))
+            + struct.pack("<H", SERVER_STATUS_AUTOCOMMIT)
+            + struct.pack("<H", SERVER_CAPABILITIES >> 16)
+            + bytes((21,))
+            + bytes(10)
+            + scramble[8:]
+            + b"\x00caching_sha2_password\x00"
+        )
+        self._seq = 0
+        self._send([greeting])
+        await self._writer.drain()
+
+        seq, response = await self._read_packet()
+        (client_flags,) = struct.unpack_from("<I", response)
+        self._seq = seq + 1
+        # caching_sha2_password fast authentication succeeded.
+        self._send([b"\x01\x03", _ok()])
+        await self._writer.drain()
+        self._compressed = bool(client_flags & CLIENT_COMPRESS)
+
+    async def _command(self, payload: bytes) -> None:
+        """Handle one command."""
+        command = payload[0]
+        if command in (COM_PING, COM_INIT_DB, COM_RESET_CONNECTION, COM_STMT_RESET):
+            packets = [_ok()]
+        elif command == COM_QUERY:
+            packets = self._query(payload[1:].decode())
+        elif command == COM_STMT_PREPARE:
+            packets = self._prepare(payload[1:].decode())
+        elif command == COM_STMT_EXECUTE:
+            packets = self._execute(payload)
+        elif command == COM_STMT_CLOSE:
+            self._statements.pop(struct.unpack_from("<I", payload, 1)[0], None)
+            return
+        else:
+            packets = [_err(1047, "08S01", "Unknown command")]
+
+        self._send(packets)
+        await self._writer.drain()
+
+    def _query(self, sql: str) -> list[bytes]:
+        """Run a text protocol query."""
+        self._server.stats.queries += 1
+        if not (match := RE_SELECT.search(sql)):
+            if sql.lstrip().lower().startswith("select"):
+                column = Column("value", TYPE_VAR_STRING, "str")
+                return [
+                    b"\x01",
+                    _column_definition("", column),
+                    _eof(),
+                    _text_value(column, ""),
+                    _eof(),
+                ]
+            return [_ok()]
+
+        columns, rows = self._select(match, [], sql)
+        packets = [_lenenc_int(len(columns))]
+        packets += [_column_definition(match.group(2), column) for column in columns]
+        packets.append(_eof())
+        packets += [
+            b"".join(
+                _text_value(column, value)
+                for column, value in zip(columns, row, strict=True)
+            )
+            for row in rows
+        ]
+        packets.append(_eof())
+        return packets
+
+    def _prepare(self, sql: str) -> list[bytes]:
+        """Prepare a statement."""
+        self._server.stats.prepares += 1
+        match = RE_SELECT.search(sql)
+        columns, _ = (
+            self._select(match, ["", dt.datetime.now()], sql) if match else ([], [])
+        )
+        statement = Statement(
+            sql, sql.count("?"), columns, match.group(2) if match else ""
+        )
+        statement_id = self._next_statement
+        self._next_statement += 1
+        self._statements[statement_id] = statement
+
+        packets = [
+            b"\x00"
+            + struct.pack("<IHH", statement_id, len(columns), statement.params)
+            + b"\x00\x00\x00"
+        ]
+        if statement.params:
+            param = Column("?", TYPE_VAR_STRING, "str")
+            packets += [_column_definition("", param)] * statement.params
+            packets.append(_eof())
+        if columns:
+            packets += [
+                _column_definition(statement.table, column) for column in columns
+            ]
+            packets.append(_eof())
+        return packets
+
+    def _execute(self, payload: bytes) -> list[bytes]:
+        """Execute a prepared statement with the binary protocol."""
+        self._server.stats.executes += 1
+        (statement_id,) = struct.unpack_from("<I", payload, 1)
+        if (statement := self._statements.get(statement_id)) is None:
+            return [_err(1243, "HY000", "Unknown prepared statement handler")]
+
+        params: list[Any] = []
+        if statement.params:
+            pos = 10
+            nulls = payload[pos : pos + (statement.params + 7) // 8]
+            pos += len(nulls)
+            if payload[pos]:
+                statement.types = [
+                    struct.unpack_from("<H", payload, pos + 1 + 2 * index)[0]
+                    for index in range(statement.params)
+                ]
+                pos += 1 + 2 * statement.params
+            else:
+                pos += 1
+            for index, param_type in enumerate(statement.types):
+                if nulls[index // 8] & (1 << (index % 8)) or param_type == TYPE_NULL:
+                    params.append(None)
+                    continue
+                value, pos = _read_binary_param(param_type, payload, pos)
+                params.append(value)
+
+        match = RE_SELECT.search(statement.sql)
+        if not match:
+            return [_ok()]
+        columns, rows = self._select(match, params, statement.sql)
+        packets = [_lenenc_int(len(columns))]
+        packets += [_column_definition(statement.table, column) for column in columns]
+        packets.append(_eof())
+        packets += [_binary_row(columns, row) for row in rows]
+        packets.append(_eof())
+        return packets
+
+    def _select(
+        self, match: re.Match[str], params: list[Any], sql: str
+    ) -> tuple[list[Column], list[list[Any]]]:
+        """Return the projected columns and rows of a SELECT."""
+        columns, rows = self._server.data.table(match.group(2), params, sql)
+        projection = match.group(1).strip()
+        if projection == "*" or not columns:
+            return columns, rows
+
+        names = [name.strip(" `") for name in projection.split(",")]
+        indexes = [
+            next(i for i, column in enumerate(columns) if column.name == name)
+            for name in names
+        ]
+        return [columns[i] for i in indexes], [
+            [row[i] for i in indexes] for row in rows
+        ]
+
+    async def _read_packet(self) -> tuple[int, bytes]:
+        """Read the next MySQL packet."""
+        if self._compressed:
+            while not self._inbox:
+                header = await self._reader.readexactly(7)
+                length = int.from_bytes(header[0:3], "little")
+                self._compressed_seq = header[3] + 1
+                raw_length = int.from_bytes(header[4:7], "little")
+                body = await self._reader.readexactly(length)
+                self._server.stats.bytes_in += 7 + length
+                if raw_length:
+                    body = zlib.decompress(body)
+                while body:
+                    size = int.from_bytes(body[0:3], "little")
+                    self._inbox.append((body[3], body[4 : 4 + size]))
+                    body = body[4 + size :]
+            return self._inbox.pop(0)
+
+        header = await self._reader.readexactly(4)
+        length = int.from_bytes(header[0:3], "little")
+        payload = await self._reader.readexactly(length)
+        self._server.stats.bytes_in += 4 + length
+        return header[3], payload
+
+    def _send(self, payloads: list[bytes]) -> None:
+        """Write packets, in one compressed packet when compression is on."""
+        data = bytearray()
+        for payload in payloads:
+            data += struct.pack("<I", len(payload))[:3] + bytes((self._seq % 256,))
+            data += payload
+            self._seq += 1
+
+        if self._compressed:
+            if len(data) > MIN_COMPRESS_LENGTH:
+                body = zlib.compress(bytes(data))
+                raw_length = len(data)
+            else:
+                body = bytes(data)
+                raw_length = 0
+            data = bytearray(
+                struct.pack("<I", len(body))[:3]
+                + bytes((self._compressed_seq % 256,))
+                + struct.pack("<I", raw_length)[:3]
+                + body
+            )
+            self._compressed_seq += 1
+
+        self._server.stats.bytes_out += len(data)
+        self._writer.write(bytes(data))
+
+
+class StandInServer:
+    """MySQL protocol stand-in running on its own thread and event loop."""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        failure_rate: float = 0.0,
+        forecast_period: float = 600.0,
+        archive_days: float = 1.0,
+    ) -> None:
+        """Initialize the server settings."""
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.stats = ServerStats()
+        self.data = MeteobridgeData(forecast_period, archive_days)
+        self._loop = asyncio.new_event_loop()
+        self._thread = Thread(
+            target=self._loop.run_forever, name="mysql-standin", daemon=True
+        )
+        self._server: asyncio.Server | None = None
+        self._writers: set[asyncio.StreamWriter] = set()
+
+    def start(self) -> None:
+        """Start listening, updating the port if an ephemeral one was asked for."""
+        self._thread.start()
+        self._server = asyncio.run_coroutine_threadsafe(
+            asyncio.start_server(self._handle, self.host, self.port), self._loop
+        ).result()
+        self.port = self._server.sockets[0].getsockname()[1]
+        _LOGGER.info("MySQL stand-in listening on %s:%s", self.host, self.port)
+
+    def stop(self) -> None:
+        """Stop the server, its connections and its thread."""
+        asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop).result(timeout=5)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+
+    async def _shutdown(self) -> None:
+        """Close the listener and the open connections."""
+        if self._server is not None:
+            self._server.close()
+        for writer in self._writers:
+            writer.close()
+        tasks = [
+            task for task in asyncio.all_tasks() if task is not asyncio.current_task()
+        ]
+        if tasks:
+            await asyncio.wait(tasks, timeout=2)
+
+    async def _handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        """Serve a new client."""
+        self._writers.add(writer)
+        try:
+            await Connection(self, reader, writer).run()
+        finally:
+            self._writers.discard(writer)
@@ -0,0 +1,154 @@
+"""Tests for the archive export."""
+
+from __future__ import annotations
+
+import asyncio
+import csv
+from datetime import datetime, timedelta
+import gzip
+import operator
+from pathlib import Path
+import re
+from types import SimpleNamespace
+from typing import Any
+
+from pymeteobridgesql import MeteobridgeSQLDatabaseConnectionError
+import pytest
+
+from custom_components.meteobridge import export
+from custom_components.meteobridge.executor import DatabaseExecutor
+from custom_components.meteobridge.replica import MeteobridgeSQLReplica
+
+START = datetime(2024, 1, 1, 22)
+COMPARISONS = {">=": operator.ge, ">": operator.gt, "=": operator.eq}
+
+
+class FakeHass:
+    """Just enough of Home Assistant to run an export."""
+
+    def __init__(self, path: Path) -> None:
+        """Keep the files in path."""
+        self.config = SimpleNamespace(path=lambda *parts: str(path.joinpath(*parts)))
+
+    async def async_add_executor_job(self, target: Any, *args: Any) -> Any:
+        """Run a blocking job."""
+        return await asyncio.get_running_loop().run_in_executor(None, target, *args)
+
+
+class FakeDatabase:
+    """Archive table answering the export and replica queries."""
+
+    def __init__(self, rows: list[tuple[datetime, float]]) -> None:
+        """Serve rows of (logdate, value)."""
+        self.rows = rows
+        self.executor = DatabaseExecutor()
+        self.down = False
+
+    async def async_run(self, target: Any, *args: Any) -> Any:
+        """Run a query job."""
+        return await self.executor.async_run(target, *args)
+
+    def query(
+        self, sql: str, params: tuple[Any, ...]
+    ) -> tuple[list[str], list[tuple[Any, ...]]]:
+        """Return the rows matching the first parameter, up to the second."""
+        if self.down:
+            raise MeteobridgeSQLDatabaseConnectionError("Failed to connect")
+        compare = COMPARISONS[re.search(r"` (>=|>|=) %s", sql).group(1)]
+        end = params[1] if len(params) > 1 else datetime.max
+        rows = [row for row in self.rows if compare(row[0], params[0]) and row[0] < end]
+        if "LIMIT" in sql:
+            rows = rows[: int(sql.rsplit("LIMIT ", 1)[1])]
+        return ["logdate", "value"], rows
+
+
+def _export(
+    tmp_path: Path,
+    database: FakeDatabase,
+    replica: Any,
+    down: bool = False,
+    table: export.ExportTable = export.EXPORT_TABLES["minute_data"],
+) -> tuple[export.MeteobridgeSQLExport, list[list[str]]]:
+    """Export the whole minute_data table and return the job and the CSV rows."""
+    hass = FakeHass(tmp_path)
+
+    async def run() -> export.MeteobridgeSQLExport:
+        if replica is not None:
+            await hass.async_add_executor_job(replica.open)
+            await replica.async_sync()
+        database.down = down
+        job = export.MeteobridgeSQLExport(
+            hass,
+            database,
+            replica,
+            "aa:bb:cc:dd:ee:ff",
+            table,
+            START,
+            START + timedelta(days=1),
+        )
+        await job.async_run()
+        if replica is not None:
+            replica.close()
+        return job
+
+    job = asyncio.run(run())
+    with gzip.open(job.path, "rt", newline="") as file:
+        return job, list(csv.reader(file))
+
+
+def test_replica_pages_continue_after_midnight(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """A replica page ending on a midnight row does not repeat it."""
+    monkeypatch.setattr(export, "EXPORT_BATCH_SIZE", 3)
+    rows = [(START + timedelta(hours=hour), float(hour)) for hour in range(8)]
+    database = FakeDatabase(rows)
+    replica = MeteobridgeSQLReplica(FakeHass(tmp_path), database, "aa:bb:cc:dd:ee:ff")
+
+    _, written = _export(tmp_path, database, replica)
+
+    assert written[0] == ["logdate", "value"]
+    assert [float(row[1]) for row in written[1:]] == [value for _, value in rows]
+
+
+def test_replica_rows_kept_when_database_is_down(tmp_path: Path) -> None:
+    """The replicated range is exported and the rows MySQL could not add flagged."""
+    rows = [(START + timedelta(hours=hour), float(hour)) for hour in range(8)]
+    database = FakeDatabase(rows)
+    replica = MeteobridgeSQLReplica(FakeHass(tmp_path), database, "aa:bb:cc:dd:ee:ff")
+
+    job, written = _export(tmp_path, database, replica, down=True)
+
+    # The newest replicated time is read from MySQL again, so it is missing.
+    assert [float(row[1]) for row in written[1:]] == [value for _, value in rows[:-1]]
+    assert job.missing_from == rows[-1][0]
+
+
+def test_database_down_without_replica_fails(tmp_path: Path) -> None:
+    """Without a replica a failing database fails the export."""
+    database = FakeDatabase([(START, 0.0)])
+
+    with pytest.raises(MeteobridgeSQLDatabaseConnectionError):
+        _export(tmp_path, database, None, down=True)
+    assert not list(tmp_path.glob("*.csv.gz*"))
+
+
+@pytest.mark.parametrize("shared", [3, 4, 7])
+def test_rows_sharing_a_time_across_pages(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, shared: int
+) -> None:
+    """Rows sharing a time are written once, even when they fill whole pages."""
+    monkeypatch.setattr(export, "EXPORT_BATCH_SIZE", 3)
+    table = export.ExportTable("minute_data", "viewMinuteData", "logdate")
+    rows = [
+        (START, 0.0),
+        *(
+            (START + timedelta(minutes=1), float(value))
+            for value in range(1, shared + 1)
+        ),
+        (START + timedelta(minutes=2), float(shared + 1)),
+    ]
+
+    _, written = _export(tmp_path, FakeDatabase(rows), None, table=table)
+
+    assert sorted(float(row[1]) for row in written[1:]) == [value for _, value in rows]